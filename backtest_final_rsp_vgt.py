@@ -5,18 +5,36 @@ Optimized parameters: 65/30/50, 90% capital
 Tested across 2020-2025
 """
 
+import argparse
+import hashlib
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-
-def calculate_rsi(prices, period=14):
-    """Calculate RSI indicator"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from core.simulate import ENTER_LONG_A, ENTER_SHORT_A, simulate
+from strategies.indicators import ratio_rsi
+
+def bars_source(csv_path):
+    """Prefer the Parquet copy of a clean CSV, unless the CSV was rewritten after it"""
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    if parquet_path.exists() and parquet_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns:
+        return parquet_path
+    return csv_path
+
+def load_bars(paths):
+    """Read clean bar files into one DataFrame indexed by Datetime, first file wins on overlap"""
+    tables = [pq.read_table(path) if path.suffix == '.parquet' else pacsv.read_csv(path) for path in paths]
+    combined = pa.concat_tables(tables, promote_options='permissive').combine_chunks()
+    df = combined.to_pandas(split_blocks=True, self_destruct=True)
+    df = df.set_index('Datetime').sort_index(kind='stable')
+    return df[~df.index.duplicated(keep='first')]
 
 # OPTIMIZED PARAMETERS
 RSI_ENTRY_HIGH = 65
@@ -24,6 +42,14 @@ RSI_ENTRY_LOW = 30
 RSI_EXIT = 50
 CAPITAL_USAGE = 0.90
 
+# Bump when the indicator calculation changes so stale caches are ignored
+CACHE_VERSION = 2
+CACHE_DIR = Path('data/_cache')
+
+parser = argparse.ArgumentParser(description="Backtest the RSP/VGT pair trading strategy.")
+parser.add_argument("--plot", action="store_true", help="Save the equity and RSI chart to a PNG.")
+args = parser.parse_args()
+
 print("="*70)
 print("RSP/VGT PAIR TRADING STRATEGY - FINAL BACKTEST")
 print("="*70)
@@ -35,151 +61,81 @@ print(f"  Capital Usage:  {CAPITAL_USAGE*100:.0f}%")
 print("="*70)
 
 # Load data - try multiple sources to get full 2020-2025
-rsp_dfs = []
-vgt_dfs = []
-
 data_sources = [
     ('data/RSP_1Day_stock_alpaca_clean.csv', 'data/VGT_1Day_stock_alpaca_clean.csv'),
     ('data/RSP_2022_2024_1Day_stock_alpaca_clean.csv', 'data/VGT_2022_2024_1Day_stock_alpaca_clean.csv'),
     ('data/RSP_2024_today_1Day_stock_alpaca_clean.csv', 'data/VGT_2024_today_1Day_stock_alpaca_clean.csv')
 ]
+available = [
+    (bars_source(rsp), bars_source(vgt))
+    for rsp, vgt in data_sources
+    if Path(rsp).exists() and Path(vgt).exists()
+]
+if not available:
+    print("ERROR: Could not load data")
+    exit(1)
+
+# Aligned prices + ratio RSI are cached per set of input files (path, mtime, size)
+key_material = f"v{CACHE_VERSION}|" + "|".join(
+    f"{path}:{path.stat().st_mtime_ns}:{path.stat().st_size}"
+    for pair in available for path in pair
+)
+cache_key = hashlib.blake2b(key_material.encode(), digest_size=8).hexdigest()
+cache_path = CACHE_DIR / f"{cache_key}.parquet"
+
+if cache_path.exists():
+    bars = pd.read_parquet(cache_path)
+    print(f"\nLoaded cached indicators: {bars.index[0].date()} to {bars.index[-1].date()}")
+else:
+    # Combine all data
+    rsp_df = load_bars([rsp for rsp, _ in available])
+    vgt_df = load_bars([vgt for _, vgt in available])
 
-for rsp_file, vgt_file in data_sources:
-    try:
-        rsp = pd.read_csv(rsp_file, index_col='Datetime', parse_dates=True)
-        vgt = pd.read_csv(vgt_file, index_col='Datetime', parse_dates=True)
-        rsp_dfs.append(rsp)
-        vgt_dfs.append(vgt)
-    except:
-        pass
-
-# Combine all data
-if rsp_dfs and vgt_dfs:
-    rsp_df = pd.concat(rsp_dfs).sort_index()
-    vgt_df = pd.concat(vgt_dfs).sort_index()
-    
-    # Remove duplicates
-    rsp_df = rsp_df[~rsp_df.index.duplicated(keep='first')]
-    vgt_df = vgt_df[~vgt_df.index.duplicated(keep='first')]
-    
     print(f"\nLoaded data: {rsp_df.index[0].date()} to {rsp_df.index[-1].date()}")
     print(f"Total bars: {len(rsp_df)}")
-else:
-    print("ERROR: Could not load data")
-    exit(1)
 
-# Align data
-common_idx = rsp_df.index.intersection(vgt_df.index)
-rsp_df = rsp_df.loc[common_idx]
-vgt_df = vgt_df.loc[common_idx]
-
-# Calculate ratio and RSI
-print("\nCalculating indicators...")
-rsp_df['ratio'] = rsp_df['Close'] / vgt_df['Close']
-rsp_df['ratio_rsi'] = calculate_rsi(rsp_df['ratio'], period=14)
-rsp_df = rsp_df.dropna()
-vgt_df = vgt_df.loc[rsp_df.index]
-
-print(f"Valid data points: {len(rsp_df)}")
-
-# Initialize portfolio
-portfolio = {
-    'cash': 100000,
-    'rsp_shares': 0,
-    'vgt_shares': 0,
-    'equity': [],
-    'dates': [],
-    'trades': [],
-    'entry_value': 0
-}
-
-current_position = None
+    # Align data; load_bars leaves both indexes sorted and unique, so a merge join by position suffices
+    rsp_times = rsp_df.index.values
+    vgt_times = vgt_df.index.values
+    common_times = np.intersect1d(rsp_times, vgt_times, assume_unique=True)
+    rsp_df = rsp_df.iloc[np.searchsorted(rsp_times, common_times)]
+    vgt_df = vgt_df.iloc[np.searchsorted(vgt_times, common_times)]
+
+    # Calculate ratio and RSI
+    print("\nCalculating indicators...")
+    rsp_df['ratio_rsi'] = ratio_rsi(
+        rsp_df['Close'].to_numpy(dtype=np.float64), vgt_df['Close'].to_numpy(dtype=np.float64), 14
+    )
+    valid = rsp_df.notna().all(axis=1).to_numpy()
+    rsp_df = rsp_df[valid]
+    vgt_df = vgt_df[valid]
+
+    bars = pd.DataFrame(
+        {'rsp_close': rsp_df['Close'], 'vgt_close': vgt_df['Close'], 'ratio_rsi': rsp_df['ratio_rsi']},
+        index=rsp_df.index,
+    )
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    bars.to_parquet(cache_path, compression='zstd')
+
+print(f"Valid data points: {len(bars)}")
+
+# Extract contiguous arrays once; the simulation never touches .loc
+close_rsp = bars['rsp_close'].to_numpy(dtype=np.float64)
+close_vgt = bars['vgt_close'].to_numpy(dtype=np.float64)
+rsi = bars['ratio_rsi'].to_numpy(dtype=np.float64)
+dates = bars.index
 
 print("\nRunning backtest...")
 print("="*70)
 
-for date in rsp_df.index:
-    rsp_price = rsp_df.loc[date, 'Close']
-    vgt_price = vgt_df.loc[date, 'Close']
-    ratio_rsi = rsp_df.loc[date, 'ratio_rsi']
-    
-    # Calculate portfolio value
-    portfolio_value = portfolio['cash'] + \
-                      portfolio['rsp_shares'] * rsp_price + \
-                      portfolio['vgt_shares'] * vgt_price
-    
-    portfolio['equity'].append(portfolio_value)
-    portfolio['dates'].append(date)
-    
-    # Exit logic
-    if current_position == 'short_rsp_long_vgt' and ratio_rsi < RSI_EXIT:
-        portfolio['cash'] += portfolio['rsp_shares'] * rsp_price + portfolio['vgt_shares'] * vgt_price
-        pnl = portfolio_value - portfolio['entry_value']
-        
-        portfolio['trades'].append(
-            f"{date.date()}: EXIT | RSI={ratio_rsi:.1f} | PnL: ${pnl:.2f}"
-        )
-        
-        portfolio['rsp_shares'] = 0
-        portfolio['vgt_shares'] = 0
-        current_position = None
-        portfolio['entry_value'] = 0
-        
-    elif current_position == 'long_rsp_short_vgt' and ratio_rsi > (100 - RSI_EXIT):
-        portfolio['cash'] += portfolio['rsp_shares'] * rsp_price + portfolio['vgt_shares'] * vgt_price
-        pnl = portfolio_value - portfolio['entry_value']
-        
-        portfolio['trades'].append(
-            f"{date.date()}: EXIT | RSI={ratio_rsi:.1f} | PnL: ${pnl:.2f}"
-        )
-        
-        portfolio['rsp_shares'] = 0
-        portfolio['vgt_shares'] = 0
-        current_position = None
-        portfolio['entry_value'] = 0
-    
-    # Entry logic
-    if current_position is None:
-        position_size = portfolio_value * CAPITAL_USAGE / 2
-        
-        if ratio_rsi > RSI_ENTRY_HIGH:
-            # RSP expensive vs VGT → Short RSP, Long VGT
-            rsp_shares = -(position_size // rsp_price)
-            vgt_shares = position_size // vgt_price
-            
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['vgt_shares'] = vgt_shares
-            portfolio['cash'] -= (vgt_shares * vgt_price)
-            portfolio['cash'] += (-rsp_shares * rsp_price)
-            portfolio['entry_value'] = portfolio_value
-            
-            current_position = 'short_rsp_long_vgt'
-            
-            portfolio['trades'].append(
-                f"{date.date()}: ENTER SHORT RSP/LONG VGT | RSI={ratio_rsi:.1f}"
-            )
-            
-        elif ratio_rsi < RSI_ENTRY_LOW:
-            # VGT expensive vs RSP → Long RSP, Short VGT
-            rsp_shares = position_size // rsp_price
-            vgt_shares = -(position_size // vgt_price)
-            
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['vgt_shares'] = vgt_shares
-            portfolio['cash'] -= (rsp_shares * rsp_price)
-            portfolio['cash'] += (-vgt_shares * vgt_price)
-            portfolio['entry_value'] = portfolio_value
-            
-            current_position = 'long_rsp_short_vgt'
-            
-            portfolio['trades'].append(
-                f"{date.date()}: ENTER LONG RSP/SHORT VGT | RSI={ratio_rsi:.1f}"
-            )
+equity, position, trade_idx, trade_kind, trade_value = simulate(
+    close_rsp, close_vgt, rsi, 100000.0, CAPITAL_USAGE, RSI_ENTRY_HIGH, RSI_ENTRY_LOW, RSI_EXIT
+)
 
 # Results
-final_value = portfolio['equity'][-1]
+final_value = equity[-1]
 total_pnl = final_value - 100000
-total_trades = len([t for t in portfolio['trades'] if 'ENTER' in t])
+total_trades = int(np.count_nonzero((trade_kind == ENTER_SHORT_A) | (trade_kind == ENTER_LONG_A)))
 
 print("\n" + "="*70)
 print("FINAL RESULTS")
@@ -193,43 +149,52 @@ if total_trades > 0:
     print(f"Avg P&L per trade: ${total_pnl/total_trades:.2f}")
 
 # Calculate Sharpe
-returns = pd.Series(portfolio['equity']).pct_change().dropna()
+returns = pd.Series(equity).pct_change().dropna()
 if len(returns) > 0 and returns.std() > 0:
     sharpe = (returns.mean() / returns.std()) * np.sqrt(252)
     print(f"Sharpe Ratio:      {sharpe:.2f}")
 
 print("\nLast 20 Trades:")
-for trade in portfolio['trades'][-20:]:
-    print(f"  {trade}")
+for i, kind, value in zip(trade_idx[-20:], trade_kind[-20:], trade_value[-20:]):
+    date = dates[i]
+    if kind == ENTER_SHORT_A:
+        print(f"  {date.date()}: ENTER SHORT RSP/LONG VGT | RSI={rsi[i]:.1f}")
+    elif kind == ENTER_LONG_A:
+        print(f"  {date.date()}: ENTER LONG RSP/SHORT VGT | RSI={rsi[i]:.1f}")
+    else:
+        print(f"  {date.date()}: EXIT | RSI={rsi[i]:.1f} | PnL: ${value:.2f}")
 
 # Plot
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 10), sharex=True)
-
-# Equity curve
-ax1.plot(portfolio['dates'], portfolio['equity'], linewidth=2, color='blue', label='Portfolio Value')
-ax1.axhline(y=100000, color='r', linestyle='--', linewidth=1, label='Starting Capital')
-ax1.set_ylabel('Portfolio Value ($)', fontsize=12)
-ax1.set_title('RSP/VGT Pair Trading Strategy (Optimized)', fontsize=14, fontweight='bold')
-ax1.legend()
-ax1.grid(True, alpha=0.3)
-
-# RSI
-ax2.plot(rsp_df.index, rsp_df['ratio_rsi'], linewidth=1, color='purple', label='Ratio RSI')
-ax2.axhline(y=RSI_ENTRY_HIGH, color='red', linestyle='--', linewidth=2, label=f'Entry High ({RSI_ENTRY_HIGH})')
-ax2.axhline(y=RSI_ENTRY_LOW, color='green', linestyle='--', linewidth=2, label=f'Entry Low ({RSI_ENTRY_LOW})')
-ax2.axhline(y=RSI_EXIT, color='gray', linestyle=':', linewidth=1, label=f'Exit ({RSI_EXIT})')
-ax2.fill_between(rsp_df.index, RSI_ENTRY_HIGH, 100, alpha=0.2, color='red', label='Short RSP Zone')
-ax2.fill_between(rsp_df.index, 0, RSI_ENTRY_LOW, alpha=0.2, color='green', label='Long RSP Zone')
-ax2.set_ylabel('RSI', fontsize=12)
-ax2.set_xlabel('Date', fontsize=12)
-ax2.set_title('RSP/VGT Ratio RSI', fontsize=12)
-ax2.legend(loc='upper right')
-ax2.grid(True, alpha=0.3)
-ax2.set_ylim(0, 100)
-
-plt.tight_layout()
-plt.savefig('rsp_vgt_final_backtest.png', dpi=150)
-print("\n✓ Chart saved to: rsp_vgt_final_backtest.png")
-plt.show()
+if args.plot:
+    # Draw straight onto an Agg canvas; the long series are rasterized without antialiasing
+    fig = Figure(figsize=(16, 10), dpi=150)
+    canvas = FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(2, 1, sharex=True)
+
+    # Equity curve
+    ax1.plot(dates, equity, linewidth=2, color='blue', label='Portfolio Value', rasterized=True, antialiased=False)
+    ax1.axhline(y=100000, color='r', linestyle='--', linewidth=1, label='Starting Capital')
+    ax1.set_ylabel('Portfolio Value ($)', fontsize=12)
+    ax1.set_title('RSP/VGT Pair Trading Strategy (Optimized)', fontsize=14, fontweight='bold')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    # RSI
+    ax2.plot(dates, rsi, linewidth=1, color='purple', label='Ratio RSI', rasterized=True, antialiased=False)
+    ax2.axhline(y=RSI_ENTRY_HIGH, color='red', linestyle='--', linewidth=2, label=f'Entry High ({RSI_ENTRY_HIGH})')
+    ax2.axhline(y=RSI_ENTRY_LOW, color='green', linestyle='--', linewidth=2, label=f'Entry Low ({RSI_ENTRY_LOW})')
+    ax2.axhline(y=RSI_EXIT, color='gray', linestyle=':', linewidth=1, label=f'Exit ({RSI_EXIT})')
+    ax2.fill_between(dates, RSI_ENTRY_HIGH, 100, alpha=0.2, color='red', label='Short RSP Zone')
+    ax2.fill_between(dates, 0, RSI_ENTRY_LOW, alpha=0.2, color='green', label='Long RSP Zone')
+    ax2.set_ylabel('RSI', fontsize=12)
+    ax2.set_xlabel('Date', fontsize=12)
+    ax2.set_title('RSP/VGT Ratio RSI', fontsize=12)
+    ax2.legend(loc='upper right')
+    ax2.grid(True, alpha=0.3)
+    ax2.set_ylim(0, 100)
+
+    fig.tight_layout()
+    canvas.print_png('rsp_vgt_final_backtest.png')
+    print("\n✓ Chart saved to: rsp_vgt_final_backtest.png")
 
 print("="*70)
@@ -3,23 +3,33 @@
 Aggressive Pair Trading - 90% Capital, Stop Loss Protection
 """
 
+import argparse
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.simulate import ENTER_LONG_A, ENTER_SHORT_A, STOP_LOSS, simulate
+from strategies.indicators import ratio_rsi
+
+def read_bars(csv_path):
+    """Read clean bars, preferring the Parquet copy unless the CSV was rewritten after it"""
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    if parquet_path.exists() and parquet_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns:
+        return pd.read_parquet(parquet_path).set_index('Datetime')
+    return pd.read_csv(csv_path, index_col='Datetime', parse_dates=True)
 
-def calculate_rsi(prices, period=14):
-    """Calculate RSI indicator"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+parser = argparse.ArgumentParser(description="Backtest the aggressive SPY/RSP pair trading strategy.")
+parser.add_argument("--plot", action="store_true", help="Save the equity curve to a PNG.")
+args = parser.parse_args()
 
 # Load 5-minute data
 print("Loading SPY and RSP 5-minute data...")
-spy_df = pd.read_csv('data/SPY_1Hour_stock_alpaca_clean.csv', index_col='Datetime', parse_dates=True)
-rsp_df = pd.read_csv('data/RSP_1Hour_stock_alpaca_clean.csv', index_col='Datetime', parse_dates=True)
+spy_df = read_bars('data/SPY_1Hour_stock_alpaca_clean.csv')
+rsp_df = read_bars('data/RSP_1Hour_stock_alpaca_clean.csv')
 
 # Align dates
 common_dates = spy_df.index.intersection(rsp_df.index)
@@ -30,8 +40,9 @@ print(f"Loaded {len(spy_df)} 5-minute bars")
 
 # Calculate ratio and RSI
 print("Calculating SPY/RSP ratio and RSI...")
-spy_df['ratio'] = spy_df['Close'] / rsp_df['Close']
-spy_df['ratio_rsi'] = calculate_rsi(spy_df['ratio'], period=14)
+spy_df['ratio_rsi'] = ratio_rsi(
+    spy_df['Close'].to_numpy(dtype=np.float64), rsp_df['Close'].to_numpy(dtype=np.float64), 14
+)
 
 # Drop NaN
 valid_idx = spy_df['ratio_rsi'].notna()
@@ -46,124 +57,26 @@ RSI_OVERSOLD = 30
 CAPITAL_USAGE = 0.90  # Use 90% of capital per trade
 STOP_LOSS_PCT = 0.02  # Exit if position loses 2%
 
-# Initialize portfolio
-portfolio = {
-    'cash': 100000,
-    'spy_shares': 0,
-    'rsp_shares': 0,
-    'equity': [],
-    'dates': [],
-    'trades': [],
-    'entry_value': 0
-}
-
-current_position = None
+spy_close = spy_df['Close'].to_numpy(dtype=np.float64)
+rsp_close = rsp_df['Close'].to_numpy(dtype=np.float64)
+rsi = spy_df['ratio_rsi'].to_numpy(dtype=np.float64)
+dates = spy_df.index
 
 print("\nRunning AGGRESSIVE pair trading strategy...")
 print(f"Capital Usage: {CAPITAL_USAGE*100}%")
 print(f"Stop Loss: {STOP_LOSS_PCT*100}%")
 print("="*60)
 
-for date in spy_df.index:
-    spy_price = spy_df.loc[date, 'Close']
-    rsp_price = rsp_df.loc[date, 'Close']
-    ratio_rsi = spy_df.loc[date, 'ratio_rsi']
-    
-    # Calculate portfolio value
-    portfolio_value = portfolio['cash'] + \
-                      portfolio['spy_shares'] * spy_price + \
-                      portfolio['rsp_shares'] * rsp_price
-    
-    portfolio['equity'].append(portfolio_value)
-    portfolio['dates'].append(date)
-    
-    # Check stop loss if in position
-    if current_position is not None:
-        position_pnl = portfolio_value - portfolio['entry_value']
-        loss_pct = position_pnl / portfolio['entry_value']
-        
-        if loss_pct < -STOP_LOSS_PCT:
-            # STOP LOSS HIT
-            portfolio['cash'] += portfolio['spy_shares'] * spy_price
-            portfolio['cash'] += portfolio['rsp_shares'] * rsp_price
-            
-            portfolio['trades'].append(
-                f"{date}: STOP LOSS | Loss={loss_pct*100:.2f}% | PnL: ${position_pnl:.2f}"
-            )
-            
-            portfolio['spy_shares'] = 0
-            portfolio['rsp_shares'] = 0
-            current_position = None
-            portfolio['entry_value'] = 0
-            continue
-    
-    # Trading logic
-    if current_position is None:
-        # Entry signals - use 90% of capital
-        position_size = portfolio_value * CAPITAL_USAGE / 2  # Split between SPY and RSP
-        
-        if ratio_rsi > RSI_OVERBOUGHT:
-            # Short SPY, Long RSP
-            spy_shares = -(position_size // spy_price)
-            rsp_shares = position_size // rsp_price
-            
-            portfolio['spy_shares'] = spy_shares
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['cash'] -= (rsp_shares * rsp_price)
-            portfolio['cash'] += (-spy_shares * spy_price)
-            portfolio['entry_value'] = portfolio_value
-            
-            current_position = 'short_spy_long_rsp'
-            portfolio['trades'].append(
-                f"{date}: SHORT SPY @ ${spy_price:.2f}, LONG RSP @ ${rsp_price:.2f} | "
-                f"Ratio_RSI={ratio_rsi:.1f} | Size=${position_size*2:,.0f}"
-            )
-            
-        elif ratio_rsi < RSI_OVERSOLD:
-            # Long SPY, Short RSP
-            spy_shares = position_size // spy_price
-            rsp_shares = -(position_size // rsp_price)
-            
-            portfolio['spy_shares'] = spy_shares
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['cash'] -= (spy_shares * spy_price)
-            portfolio['cash'] += (-rsp_shares * rsp_price)
-            portfolio['entry_value'] = portfolio_value
-            
-            current_position = 'long_spy_short_rsp'
-            portfolio['trades'].append(
-                f"{date}: LONG SPY @ ${spy_price:.2f}, SHORT RSP @ ${rsp_price:.2f} | "
-                f"Ratio_RSI={ratio_rsi:.1f} | Size=${position_size*2:,.0f}"
-            )
-    
-    else:
-        # Exit on mean reversion
-        should_exit = False
-        
-        if current_position == 'short_spy_long_rsp' and ratio_rsi < 50:
-            should_exit = True
-        elif current_position == 'long_spy_short_rsp' and ratio_rsi > 50:
-            should_exit = True
-        
-        if should_exit:
-            portfolio['cash'] += portfolio['spy_shares'] * spy_price
-            portfolio['cash'] += portfolio['rsp_shares'] * rsp_price
-            
-            position_pnl = portfolio_value - portfolio['entry_value']
-            portfolio['trades'].append(
-                f"{date}: CLOSE | Ratio_RSI={ratio_rsi:.1f} | PnL: ${position_pnl:.2f}"
-            )
-            
-            portfolio['spy_shares'] = 0
-            portfolio['rsp_shares'] = 0
-            current_position = None
-            portfolio['entry_value'] = 0
+equity, position, trade_idx, trade_kind, trade_value = simulate(
+    spy_close, rsp_close, rsi, 100000.0, CAPITAL_USAGE, RSI_OVERBOUGHT, RSI_OVERSOLD, 50.0,
+    STOP_LOSS_PCT, False,
+)
 
 # Results
-final_value = portfolio['equity'][-1]
+final_value = equity[-1]
 total_pnl = final_value - 100000
-total_trades = len([t for t in portfolio['trades'] if 'SHORT' in t or 'LONG' in t])
-stop_losses = len([t for t in portfolio['trades'] if 'STOP LOSS' in t])
+total_trades = int(np.count_nonzero((trade_kind == ENTER_SHORT_A) | (trade_kind == ENTER_LONG_A)))
+stop_losses = int(np.count_nonzero(trade_kind == STOP_LOSS))
 
 print("\n" + "="*60)
 print("AGGRESSIVE STRATEGY RESULTS")
@@ -177,19 +90,40 @@ print(f"Stop Losses Hit: {stop_losses}")
 print(f"\nCapital Usage: {CAPITAL_USAGE*100}% per trade")
 print(f"Stop Loss: {STOP_LOSS_PCT*100}%")
 print("\nLast 20 Trades:")
-for trade in portfolio['trades'][-20:]:
-    print(f"  {trade}")
+for k in range(max(len(trade_idx) - 20, 0), len(trade_idx)):
+    i, kind, value = trade_idx[k], trade_kind[k], trade_value[k]
+    date = dates[i]
+    if kind == ENTER_SHORT_A:
+        print(
+            f"  {date}: SHORT SPY @ ${spy_close[i]:.2f}, LONG RSP @ ${rsp_close[i]:.2f} | "
+            f"Ratio_RSI={rsi[i]:.1f} | Size=${value:,.0f}"
+        )
+    elif kind == ENTER_LONG_A:
+        print(
+            f"  {date}: LONG SPY @ ${spy_close[i]:.2f}, SHORT RSP @ ${rsp_close[i]:.2f} | "
+            f"Ratio_RSI={rsi[i]:.1f} | Size=${value:,.0f}"
+        )
+    elif kind == STOP_LOSS:
+        # A stop loss always follows its entry, whose bar equity is the value the trade was entered with
+        loss_pct = value / equity[trade_idx[k - 1]]
+        print(f"  {date}: STOP LOSS | Loss={loss_pct*100:.2f}% | PnL: ${value:.2f}")
+    else:
+        print(f"  {date}: CLOSE | Ratio_RSI={rsi[i]:.1f} | PnL: ${value:.2f}")
 
 # Plot
-plt.figure(figsize=(14, 7))
-plt.plot(portfolio['dates'], portfolio['equity'], linewidth=2)
-plt.axhline(y=100000, color='r', linestyle='--', label='Starting Capital')
-plt.xlabel('Date')
-plt.ylabel('Portfolio Value ($)')
-plt.title('AGGRESSIVE SPY/RSP Pair Trading - 90% Capital + Stop Loss')
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
+if args.plot:
+    fig = Figure(figsize=(14, 7), dpi=150)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.plot(dates, equity, linewidth=2, rasterized=True, antialiased=False)
+    ax.axhline(y=100000, color='r', linestyle='--', label='Starting Capital')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Portfolio Value ($)')
+    ax.set_title('AGGRESSIVE SPY/RSP Pair Trading - 90% Capital + Stop Loss')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    canvas.print_png('spy_rsp_pair_backtest.png')
+    print("\n✓ Chart saved to: spy_rsp_pair_backtest.png")
 
 print("\n" + "="*60)
@@ -48,141 +48,139 @@ MAX_HOLD_BARS = 12   # Maximum 12 bars = 60 minutes
 PROFIT_TARGET = 0.005  # 0.5% profit target
 STOP_LOSS = 0.003     # 0.3% stop loss
 
-# Initialize portfolio
-portfolio = {
-    'cash': 100000,
-    'spy_shares': 0,
-    'rsp_shares': 0,
-    'equity': [],
-    'dates': [],
-    'trades': [],
-    'entry_value': 0,
-    'entry_bar': 0
-}
-
-current_position = None
-bars_in_position = 0
-
-print("\nRunning HYPER-SHORT scalping strategy...")
-print(f"RSI Thresholds: {RSI_OVERBOUGHT}/{RSI_OVERSOLD} (tighter)")
-print(f"Max Hold: {MAX_HOLD_BARS} bars (60 minutes)")
-print(f"Profit Target: {PROFIT_TARGET*100}%")
-print(f"Stop Loss: {STOP_LOSS*100}%")
-print("="*60)
-
-bar_count = 0
-
-for date in spy_df.index:
-    bar_count += 1
-    spy_price = spy_df.loc[date, 'Close']
-    rsp_price = rsp_df.loc[date, 'Close']
-    ratio_rsi = spy_df.loc[date, 'ratio_rsi']
-    
-    # Calculate portfolio value
-    portfolio_value = portfolio['cash'] + \
-                      portfolio['spy_shares'] * spy_price + \
-                      portfolio['rsp_shares'] * rsp_price
-    
-    portfolio['equity'].append(portfolio_value)
-    portfolio['dates'].append(date)
-    
-    # If in position, check exit conditions
-    if current_position is not None:
-        bars_in_position += 1
-        position_pnl = portfolio_value - portfolio['entry_value']
-        pnl_pct = position_pnl / portfolio['entry_value']
-        
-        should_exit = False
-        exit_reason = ""
+def run_backtest(spy_df, rsp_df):
+    """Simulate the scalping strategy bar by bar; returns the dates, equity curve and trade log"""
+    # Portfolio: cash plus signed share counts (negative = short)
+    cash = 100000
+    spy_shares = 0
+    rsp_shares = 0
+    entry_value = 0
+    trades = []
+
+    current_position = None
+    bars_in_position = 0
+
+    # Closes and ratio RSI indexed by bar
+    spy_close = spy_df['Close'].to_numpy(dtype=np.float64)
+    rsp_close = rsp_df['Close'].to_numpy(dtype=np.float64)
+    rsi_arr = spy_df['ratio_rsi'].to_numpy(dtype=np.float64)
+    dates = spy_df.index
+    n = len(dates)
+    equity = np.empty(n)
+
+    for i in range(n):
+        date = dates[i]
+        spy_price = spy_close[i]
+        rsp_price = rsp_close[i]
+        ratio_rsi = rsi_arr[i]
         
-        # 1. Profit target hit
-        if pnl_pct >= PROFIT_TARGET:
-            should_exit = True
-            exit_reason = f"PROFIT TARGET ({pnl_pct*100:.2f}%)"
+        # Calculate portfolio value
+        portfolio_value = cash + spy_shares * spy_price + rsp_shares * rsp_price
         
-        # 2. Stop loss hit
-        elif pnl_pct <= -STOP_LOSS:
-            should_exit = True
-            exit_reason = f"STOP LOSS ({pnl_pct*100:.2f}%)"
+        equity[i] = portfolio_value
         
-        # 3. Time limit reached
-        elif bars_in_position >= MAX_HOLD_BARS:
-            should_exit = True
-            exit_reason = f"TIME LIMIT ({bars_in_position} bars)"
-        
-        # 4. RSI mean reversion (original exit)
-        elif current_position == 'short_spy_long_rsp' and ratio_rsi < 50:
-            should_exit = True
-            exit_reason = f"RSI REVERSION ({ratio_rsi:.1f})"
-        elif current_position == 'long_spy_short_rsp' and ratio_rsi > 50:
-            should_exit = True
-            exit_reason = f"RSI REVERSION ({ratio_rsi:.1f})"
-        
-        if should_exit:
-            # Close position
-            portfolio['cash'] += portfolio['spy_shares'] * spy_price
-            portfolio['cash'] += portfolio['rsp_shares'] * rsp_price
+        # If in position, check exit conditions
+        if current_position is not None:
+            bars_in_position += 1
+            position_pnl = portfolio_value - entry_value
+            pnl_pct = position_pnl / entry_value
             
-            portfolio['trades'].append(
-                f"{date}: CLOSE | {exit_reason} | Held {bars_in_position} bars | PnL: ${position_pnl:.2f}"
-            )
+            should_exit = False
+            exit_reason = ""
             
-            portfolio['spy_shares'] = 0
-            portfolio['rsp_shares'] = 0
-            current_position = None
-            bars_in_position = 0
-            portfolio['entry_value'] = 0
-    
-    # Entry logic
-    if current_position is None:
-        position_size = portfolio_value * CAPITAL_USAGE / 2
-        
-        if ratio_rsi > RSI_OVERBOUGHT:
-            # Short SPY, Long RSP
-            spy_shares = -(position_size // spy_price)
-            rsp_shares = position_size // rsp_price
+            # 1. Profit target hit
+            if pnl_pct >= PROFIT_TARGET:
+                should_exit = True
+                exit_reason = f"PROFIT TARGET ({pnl_pct*100:.2f}%)"
             
-            portfolio['spy_shares'] = spy_shares
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['cash'] -= (rsp_shares * rsp_price)
-            portfolio['cash'] += (-spy_shares * spy_price)
-            portfolio['entry_value'] = portfolio_value
-            portfolio['entry_bar'] = bar_count
+            # 2. Stop loss hit
+            elif pnl_pct <= -STOP_LOSS:
+                should_exit = True
+                exit_reason = f"STOP LOSS ({pnl_pct*100:.2f}%)"
             
-            current_position = 'short_spy_long_rsp'
-            bars_in_position = 0
+            # 3. Time limit reached
+            elif bars_in_position >= MAX_HOLD_BARS:
+                should_exit = True
+                exit_reason = f"TIME LIMIT ({bars_in_position} bars)"
             
-            portfolio['trades'].append(
-                f"{date}: ENTER SHORT SPY/LONG RSP | RSI={ratio_rsi:.1f} | Size=${position_size*2:,.0f}"
-            )
+            # 4. RSI mean reversion (original exit)
+            elif current_position == 'short_spy_long_rsp' and ratio_rsi < 50:
+                should_exit = True
+                exit_reason = f"RSI REVERSION ({ratio_rsi:.1f})"
+            elif current_position == 'long_spy_short_rsp' and ratio_rsi > 50:
+                should_exit = True
+                exit_reason = f"RSI REVERSION ({ratio_rsi:.1f})"
             
-        elif ratio_rsi < RSI_OVERSOLD:
-            # Long SPY, Short RSP
-            spy_shares = position_size // spy_price
-            rsp_shares = -(position_size // rsp_price)
-            
-            portfolio['spy_shares'] = spy_shares
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['cash'] -= (spy_shares * spy_price)
-            portfolio['cash'] += (-rsp_shares * rsp_price)
-            portfolio['entry_value'] = portfolio_value
-            portfolio['entry_bar'] = bar_count
-            
-            current_position = 'long_spy_short_rsp'
-            bars_in_position = 0
+            if should_exit:
+                # Close position
+                cash += spy_shares * spy_price
+                cash += rsp_shares * rsp_price
+                
+                trades.append(
+                    f"{date}: CLOSE | {exit_reason} | Held {bars_in_position} bars | PnL: ${position_pnl:.2f}"
+                )
+                
+                spy_shares = 0
+                rsp_shares = 0
+                current_position = None
+                bars_in_position = 0
+                entry_value = 0
+        
+        # Entry logic
+        if current_position is None:
+            position_size = portfolio_value * CAPITAL_USAGE / 2
             
-            portfolio['trades'].append(
-                f"{date}: ENTER LONG SPY/SHORT RSP | RSI={ratio_rsi:.1f} | Size=${position_size*2:,.0f}"
-            )
+            if ratio_rsi > RSI_OVERBOUGHT:
+                # Short SPY, Long RSP
+                spy_shares = -(position_size // spy_price)
+                rsp_shares = position_size // rsp_price
+                
+                cash -= (rsp_shares * rsp_price)
+                cash += (-spy_shares * spy_price)
+                entry_value = portfolio_value
+                
+                current_position = 'short_spy_long_rsp'
+                bars_in_position = 0
+                
+                trades.append(
+                    f"{date}: ENTER SHORT SPY/LONG RSP | RSI={ratio_rsi:.1f} | Size=${position_size*2:,.0f}"
+                )
+                
+            elif ratio_rsi < RSI_OVERSOLD:
+                # Long SPY, Short RSP
+                spy_shares = position_size // spy_price
+                rsp_shares = -(position_size // rsp_price)
+                
+                cash -= (spy_shares * spy_price)
+                cash += (-rsp_shares * rsp_price)
+                entry_value = portfolio_value
+                
+                current_position = 'long_spy_short_rsp'
+                bars_in_position = 0
+                
+                trades.append(
+                    f"{date}: ENTER LONG SPY/SHORT RSP | RSI={ratio_rsi:.1f} | Size=${position_size*2:,.0f}"
+                )
+
+    return dates, equity, trades
+
+print("\nRunning HYPER-SHORT scalping strategy...")
+print(f"RSI Thresholds: {RSI_OVERBOUGHT}/{RSI_OVERSOLD} (tighter)")
+print(f"Max Hold: {MAX_HOLD_BARS} bars (60 minutes)")
+print(f"Profit Target: {PROFIT_TARGET*100}%")
+print(f"Stop Loss: {STOP_LOSS*100}%")
+print("="*60)
+
+dates, equity, trades = run_backtest(spy_df, rsp_df)
 
 # Results
-final_value = portfolio['equity'][-1]
+final_value = equity[-1]
 total_pnl = final_value - 100000
-entry_trades = len([t for t in portfolio['trades'] if 'ENTER' in t])
-profit_targets = len([t for t in portfolio['trades'] if 'PROFIT TARGET' in t])
-stop_losses = len([t for t in portfolio['trades'] if 'STOP LOSS' in t])
-time_exits = len([t for t in portfolio['trades'] if 'TIME LIMIT' in t])
-rsi_exits = len([t for t in portfolio['trades'] if 'RSI REVERSION' in t])
+entry_trades = len([t for t in trades if 'ENTER' in t])
+profit_targets = len([t for t in trades if 'PROFIT TARGET' in t])
+stop_losses = len([t for t in trades if 'STOP LOSS' in t])
+time_exits = len([t for t in trades if 'TIME LIMIT' in t])
+rsi_exits = len([t for t in trades if 'RSI REVERSION' in t])
 
 print("\n" + "="*60)
 print("HYPER-SHORT SCALPING RESULTS")
@@ -202,12 +200,12 @@ print(f"  Max Hold: {MAX_HOLD_BARS} bars (60 min)")
 print(f"  Profit Target: {PROFIT_TARGET*100}%")
 print(f"  Stop Loss: {STOP_LOSS*100}%")
 print("\nLast 30 Trades:")
-for trade in portfolio['trades'][-30:]:
+for trade in trades[-30:]:
     print(f"  {trade}")
 
 # Plot
 plt.figure(figsize=(14, 7))
-plt.plot(portfolio['dates'], portfolio['equity'], linewidth=1.5)
+plt.plot(dates, equity, linewidth=1.5)
 plt.axhline(y=100000, color='r', linestyle='--', label='Starting Capital')
 plt.xlabel('Date')
 plt.ylabel('Portfolio Value ($)')
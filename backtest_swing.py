@@ -67,147 +67,148 @@ CAPITAL_USAGE = 0.80   # Use 80% of capital (less aggressive)
 STOP_LOSS = 0.04       # 4% stop loss (wider for swing)
 PROFIT_TARGET = 0.03   # 3% profit target
 
-# Initialize portfolio
-portfolio = {
-    'cash': 100000,
-    'spy_shares': 0,
-    'rsp_shares': 0,
-    'equity': [],
-    'dates': [],
-    'trades': [],
-    'entry_value': 0,
-    'entry_date': None,
-    'days_in_trade': 0
-}
-
-current_position = None
-
-print("\nRunning SWING TRADING strategy...")
-print(f"Entry: RSI {RSI_OVERBOUGHT}/{RSI_OVERSOLD} + Z-score ±{ZSCORE_HIGH}")
-print(f"Hold: {MIN_HOLD_DAYS}-{MAX_HOLD_DAYS} days")
-print(f"Profit Target: {PROFIT_TARGET*100}%")
-print(f"Stop Loss: {STOP_LOSS*100}%")
-print("="*70)
-
-for date in spy_df.index:
-    spy_price = spy_df.loc[date, 'Close']
-    rsp_price = rsp_df.loc[date, 'Close']
-    ratio_rsi = spy_df.loc[date, 'ratio_rsi']
-    ratio_zscore = spy_df.loc[date, 'ratio_zscore']
-    
-    # Calculate portfolio value
-    portfolio_value = portfolio['cash'] + \
-                      portfolio['spy_shares'] * spy_price + \
-                      portfolio['rsp_shares'] * rsp_price
-    
-    portfolio['equity'].append(portfolio_value)
-    portfolio['dates'].append(date)
-    
-    # Track days in trade
-    if current_position is not None:
-        portfolio['days_in_trade'] += 1
-    
-    # Exit logic
-    if current_position is not None and portfolio['entry_value'] > 0:
-        pnl = portfolio_value - portfolio['entry_value']
-        pnl_pct = pnl / portfolio['entry_value']
-        days_held = portfolio['days_in_trade']
-        
-        should_exit = False
-        exit_reason = ""
+def run_backtest(spy_df, rsp_df):
+    """Simulate the swing strategy day by day; returns the dates, equity curve and trade log"""
+    # Portfolio and open-trade state
+    cash = 100000
+    spy_shares = 0
+    rsp_shares = 0
+    entry_value = 0
+    days_in_trade = 0
+    trades = []
+
+    current_position = None
+
+    # Daily closes, RSI and z-score as arrays aligned with dates
+    spy_close = spy_df['Close'].to_numpy(dtype=np.float64)
+    rsp_close = rsp_df['Close'].to_numpy(dtype=np.float64)
+    rsi_arr = spy_df['ratio_rsi'].to_numpy(dtype=np.float64)
+    zscore_arr = spy_df['ratio_zscore'].to_numpy(dtype=np.float64)
+    dates = spy_df.index
+    n = len(dates)
+    equity = np.empty(n)
+
+    for i in range(n):
+        date = dates[i]
+        spy_price = spy_close[i]
+        rsp_price = rsp_close[i]
+        ratio_rsi = rsi_arr[i]
+        ratio_zscore = zscore_arr[i]
         
-        # 1. Profit target
-        if pnl_pct >= PROFIT_TARGET:
-            should_exit = True
-            exit_reason = f"PROFIT TARGET ({pnl_pct*100:.2f}%)"
+        # Calculate portfolio value
+        portfolio_value = cash + spy_shares * spy_price + rsp_shares * rsp_price
         
-        # 2. Stop loss
-        elif pnl_pct <= -STOP_LOSS:
-            should_exit = True
-            exit_reason = f"STOP LOSS ({pnl_pct*100:.2f}%)"
+        equity[i] = portfolio_value
         
-        # 3. Max hold reached
-        elif days_held >= MAX_HOLD_DAYS:
-            should_exit = True
-            exit_reason = f"MAX HOLD ({days_held} days)"
+        # Track days in trade
+        if current_position is not None:
+            days_in_trade += 1
         
-        # 4. Mean reversion complete (after minimum hold)
-        elif days_held >= MIN_HOLD_DAYS:
-            if current_position == 'short_spy_long_rsp':
-                if ratio_rsi < 50 and ratio_zscore < 0.5:
-                    should_exit = True
-                    exit_reason = f"MEAN REVERSION ({days_held} days)"
-            elif current_position == 'long_spy_short_rsp':
-                if ratio_rsi > 50 and ratio_zscore > -0.5:
-                    should_exit = True
-                    exit_reason = f"MEAN REVERSION ({days_held} days)"
-        
-        if should_exit:
-            # Close position
-            portfolio['cash'] += portfolio['spy_shares'] * spy_price
-            portfolio['cash'] += portfolio['rsp_shares'] * rsp_price
+        # Exit logic
+        if current_position is not None and entry_value > 0:
+            pnl = portfolio_value - entry_value
+            pnl_pct = pnl / entry_value
+            days_held = days_in_trade
             
-            portfolio['trades'].append(
-                f"{date.date()}: EXIT | {exit_reason} | PnL: ${pnl:.2f} ({pnl_pct*100:.2f}%)"
-            )
+            should_exit = False
+            exit_reason = ""
             
-            portfolio['spy_shares'] = 0
-            portfolio['rsp_shares'] = 0
-            current_position = None
-            portfolio['entry_value'] = 0
-            portfolio['entry_date'] = None
-            portfolio['days_in_trade'] = 0
-    
-    # Entry logic - only if no position
-    if current_position is None:
-        position_size = portfolio_value * CAPITAL_USAGE / 2
-        
-        # ENTRY CONDITION 1: RSI + Z-score both extreme (short SPY/long RSP)
-        if ratio_rsi > RSI_OVERBOUGHT and ratio_zscore > ZSCORE_HIGH:
-            spy_shares = -(position_size // spy_price)
-            rsp_shares = position_size // rsp_price
+            # 1. Profit target
+            if pnl_pct >= PROFIT_TARGET:
+                should_exit = True
+                exit_reason = f"PROFIT TARGET ({pnl_pct*100:.2f}%)"
             
-            portfolio['spy_shares'] = spy_shares
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['cash'] -= (rsp_shares * rsp_price)
-            portfolio['cash'] += (-spy_shares * spy_price)
-            portfolio['entry_value'] = portfolio_value
-            portfolio['entry_date'] = date
-            portfolio['days_in_trade'] = 0
+            # 2. Stop loss
+            elif pnl_pct <= -STOP_LOSS:
+                should_exit = True
+                exit_reason = f"STOP LOSS ({pnl_pct*100:.2f}%)"
             
-            current_position = 'short_spy_long_rsp'
+            # 3. Max hold reached
+            elif days_held >= MAX_HOLD_DAYS:
+                should_exit = True
+                exit_reason = f"MAX HOLD ({days_held} days)"
             
-            portfolio['trades'].append(
-                f"{date.date()}: ENTER SHORT SPY/LONG RSP | RSI={ratio_rsi:.1f}, Z={ratio_zscore:.2f}"
-            )
-        
-        # ENTRY CONDITION 2: RSI + Z-score both extreme (long SPY/short RSP)
-        elif ratio_rsi < RSI_OVERSOLD and ratio_zscore < ZSCORE_LOW:
-            spy_shares = position_size // spy_price
-            rsp_shares = -(position_size // rsp_price)
+            # 4. Mean reversion complete (after minimum hold)
+            elif days_held >= MIN_HOLD_DAYS:
+                if current_position == 'short_spy_long_rsp':
+                    if ratio_rsi < 50 and ratio_zscore < 0.5:
+                        should_exit = True
+                        exit_reason = f"MEAN REVERSION ({days_held} days)"
+                elif current_position == 'long_spy_short_rsp':
+                    if ratio_rsi > 50 and ratio_zscore > -0.5:
+                        should_exit = True
+                        exit_reason = f"MEAN REVERSION ({days_held} days)"
             
-            portfolio['spy_shares'] = spy_shares
-            portfolio['rsp_shares'] = rsp_shares
-            portfolio['cash'] -= (spy_shares * spy_price)
-            portfolio['cash'] += (-rsp_shares * rsp_price)
-            portfolio['entry_value'] = portfolio_value
-            portfolio['entry_date'] = date
-            portfolio['days_in_trade'] = 0
+            if should_exit:
+                # Close position
+                cash += spy_shares * spy_price
+                cash += rsp_shares * rsp_price
+                
+                trades.append(
+                    f"{date.date()}: EXIT | {exit_reason} | PnL: ${pnl:.2f} ({pnl_pct*100:.2f}%)"
+                )
+                
+                spy_shares = 0
+                rsp_shares = 0
+                current_position = None
+                entry_value = 0
+                days_in_trade = 0
+        
+        # Entry logic - only if no position
+        if current_position is None:
+            position_size = portfolio_value * CAPITAL_USAGE / 2
             
-            current_position = 'long_spy_short_rsp'
+            # ENTRY CONDITION 1: RSI + Z-score both extreme (short SPY/long RSP)
+            if ratio_rsi > RSI_OVERBOUGHT and ratio_zscore > ZSCORE_HIGH:
+                spy_shares = -(position_size // spy_price)
+                rsp_shares = position_size // rsp_price
+                
+                cash -= (rsp_shares * rsp_price)
+                cash += (-spy_shares * spy_price)
+                entry_value = portfolio_value
+                days_in_trade = 0
+                
+                current_position = 'short_spy_long_rsp'
+                
+                trades.append(
+                    f"{date.date()}: ENTER SHORT SPY/LONG RSP | RSI={ratio_rsi:.1f}, Z={ratio_zscore:.2f}"
+                )
             
-            portfolio['trades'].append(
-                f"{date.date()}: ENTER LONG SPY/SHORT RSP | RSI={ratio_rsi:.1f}, Z={ratio_zscore:.2f}"
-            )
+            # ENTRY CONDITION 2: RSI + Z-score both extreme (long SPY/short RSP)
+            elif ratio_rsi < RSI_OVERSOLD and ratio_zscore < ZSCORE_LOW:
+                spy_shares = position_size // spy_price
+                rsp_shares = -(position_size // rsp_price)
+                
+                cash -= (spy_shares * spy_price)
+                cash += (-rsp_shares * rsp_price)
+                entry_value = portfolio_value
+                days_in_trade = 0
+                
+                current_position = 'long_spy_short_rsp'
+                
+                trades.append(
+                    f"{date.date()}: ENTER LONG SPY/SHORT RSP | RSI={ratio_rsi:.1f}, Z={ratio_zscore:.2f}"
+                )
+
+    return dates, equity, trades
+
+print("\nRunning SWING TRADING strategy...")
+print(f"Entry: RSI {RSI_OVERBOUGHT}/{RSI_OVERSOLD} + Z-score ±{ZSCORE_HIGH}")
+print(f"Hold: {MIN_HOLD_DAYS}-{MAX_HOLD_DAYS} days")
+print(f"Profit Target: {PROFIT_TARGET*100}%")
+print(f"Stop Loss: {STOP_LOSS*100}%")
+print("="*70)
+
+dates, equity, trades = run_backtest(spy_df, rsp_df)
 
 # Results
-final_value = portfolio['equity'][-1]
+final_value = equity[-1]
 total_pnl = final_value - 100000
-entry_trades = len([t for t in portfolio['trades'] if 'ENTER' in t])
-profit_exits = len([t for t in portfolio['trades'] if 'PROFIT TARGET' in t])
-stop_exits = len([t for t in portfolio['trades'] if 'STOP LOSS' in t])
-time_exits = len([t for t in portfolio['trades'] if 'MAX HOLD' in t])
-mean_rev_exits = len([t for t in portfolio['trades'] if 'MEAN REVERSION' in t])
+entry_trades = len([t for t in trades if 'ENTER' in t])
+profit_exits = len([t for t in trades if 'PROFIT TARGET' in t])
+stop_exits = len([t for t in trades if 'STOP LOSS' in t])
+time_exits = len([t for t in trades if 'MAX HOLD' in t])
+mean_rev_exits = len([t for t in trades if 'MEAN REVERSION' in t])
 
 print("\n" + "="*70)
 print("SWING TRADING RESULTS")
@@ -226,12 +227,12 @@ print(f"\nAverage P&L per trade: ${total_pnl/max(entry_trades,1):.2f}")
 print(f"\nStrategy: Swing (Daily bars, multi-day holds)")
 print(f"Signals: RSI {RSI_OVERBOUGHT}/{RSI_OVERSOLD} + Z-score ±{ZSCORE_HIGH}")
 print("\nAll Trades:")
-for trade in portfolio['trades']:
+for trade in trades:
     print(f"  {trade}")
 
 # Plot
 plt.figure(figsize=(14, 7))
-plt.plot(portfolio['dates'], portfolio['equity'], linewidth=2)
+plt.plot(dates, equity, linewidth=2)
 plt.axhline(y=100000, color='r', linestyle='--', label='Starting Capital')
 plt.xlabel('Date')
 plt.ylabel('Portfolio Value ($)')
@@ -0,0 +1,24 @@
+"""
+Numba decorators with a no-op fallback so kernels still run (slowly) when
+numba is not installed.
+"""
+
+from __future__ import annotations
+
+try:
+    from numba import njit, prange
+except ImportError:  # pragma: no cover - exercised only without numba
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+    prange = range
+
+
+__all__ = ["njit", "prange"]
@@ -0,0 +1,175 @@
+"""
+Compiled bar-by-bar simulation of the two-leg ratio-RSI pair trade used by
+the standalone backtest scripts.
+
+Leg A is the ratio numerator and leg B the denominator. When the ratio RSI is
+above `rsi_hi` the kernel shorts A and buys B; below `rsi_lo` it buys A and
+shorts B. Positions are closed when the RSI reverts through `rsi_exit`
+(short A) or `100 - rsi_exit` (long A), or when the open trade loses more than
+`stop_loss` of the equity it was entered with.
+
+`sweep` runs independent simulations for many parameter sets in parallel
+over the same price and RSI arrays.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from core._njit import njit, prange
+
+# Trade record kinds returned by `simulate`
+ENTER_SHORT_A = 1
+ENTER_LONG_A = 2
+EXIT = 3
+STOP_LOSS = 4
+
+
+@njit(cache=True)
+def simulate(
+    close_a,
+    close_b,
+    rsi,
+    cash0,
+    cap_use,
+    rsi_hi,
+    rsi_lo,
+    rsi_exit,
+    stop_loss=0.0,
+    reenter_on_exit=True,
+):
+    """
+    Run the pair trade over aligned float64 arrays.
+
+    Args:
+        close_a, close_b: Close prices of the two legs.
+        rsi: RSI of close_a / close_b (no NaNs).
+        cash0: Starting cash.
+        cap_use: Fraction of equity deployed per trade, split across both legs.
+        rsi_hi, rsi_lo, rsi_exit: Entry and exit thresholds.
+        stop_loss: Fractional loss that closes a trade (0 disables it).
+        reenter_on_exit: Allow a new entry on the bar a trade was exited.
+
+    Returns:
+        equity: Portfolio value at each bar, before that bar's trades.
+        position: Position held after each bar (1 long A, -1 short A, 0 flat).
+        trade_idx, trade_kind, trade_value: One row per trade event. The value
+            is the gross position size for entries and the P&L for exits.
+    """
+    n = rsi.shape[0]
+    equity = np.empty(n, dtype=np.float64)
+    position = np.empty(n, dtype=np.int8)
+    trade_idx = np.empty(2 * n, dtype=np.int64)
+    trade_kind = np.empty(2 * n, dtype=np.int8)
+    trade_value = np.empty(2 * n, dtype=np.float64)
+
+    cash = cash0
+    shares_a = 0.0
+    shares_b = 0.0
+    entry_value = 0.0
+    pos = 0
+    k = 0
+
+    for i in range(n):
+        price_a = close_a[i]
+        price_b = close_b[i]
+        # Flat bars are worth exactly the cash balance; only mark legs when held
+        if pos == 0:
+            portfolio_value = cash
+        else:
+            portfolio_value = cash + shares_a * price_a + shares_b * price_b
+        equity[i] = portfolio_value
+
+        if pos != 0 and stop_loss > 0.0:
+            pnl = portfolio_value - entry_value
+            if pnl / entry_value < -stop_loss:
+                cash += shares_a * price_a + shares_b * price_b
+                trade_idx[k] = i
+                trade_kind[k] = STOP_LOSS
+                trade_value[k] = pnl
+                k += 1
+                shares_a = 0.0
+                shares_b = 0.0
+                entry_value = 0.0
+                pos = 0
+                position[i] = 0
+                continue
+
+        exited = False
+        if (pos == -1 and rsi[i] < rsi_exit) or (pos == 1 and rsi[i] > 100.0 - rsi_exit):
+            cash += shares_a * price_a + shares_b * price_b
+            trade_idx[k] = i
+            trade_kind[k] = EXIT
+            trade_value[k] = portfolio_value - entry_value
+            k += 1
+            shares_a = 0.0
+            shares_b = 0.0
+            entry_value = 0.0
+            pos = 0
+            exited = True
+
+        if pos == 0 and (reenter_on_exit or not exited):
+            position_size = portfolio_value * cap_use / 2
+            if rsi[i] > rsi_hi:
+                shares_a = -(position_size // price_a)
+                shares_b = position_size // price_b
+                cash -= shares_b * price_b
+                cash += -shares_a * price_a
+                pos = -1
+                trade_kind[k] = ENTER_SHORT_A
+            elif rsi[i] < rsi_lo:
+                shares_a = position_size // price_a
+                shares_b = -(position_size // price_b)
+                cash -= shares_a * price_a
+                cash += -shares_b * price_b
+                pos = 1
+                trade_kind[k] = ENTER_LONG_A
+            if pos != 0:
+                entry_value = portfolio_value
+                trade_idx[k] = i
+                trade_value[k] = position_size * 2
+                k += 1
+
+        position[i] = pos
+
+    return equity, position, trade_idx[:k], trade_kind[:k], trade_value[:k]
+
+
+@njit(parallel=True, cache=True)
+def sweep(close_a, close_b, rsi, cash0, params):
+    """
+    Simulate every parameter set in `params` across all cores.
+
+    Args:
+        close_a, close_b, rsi: Aligned float64 arrays, as for `simulate`.
+        cash0: Starting cash.
+        params: (K, 5) float64 array of rows
+            (rsi_hi, rsi_lo, rsi_exit, cap_use, stop_loss).
+
+    Returns:
+        final_value: Last equity value for each parameter set.
+        entries: Number of trades entered for each parameter set.
+    """
+    k_total = params.shape[0]
+    final_value = np.empty(k_total, dtype=np.float64)
+    entries = np.zeros(k_total, dtype=np.int64)
+    for k in prange(k_total):
+        equity, _, _, trade_kind, _ = simulate(
+            close_a,
+            close_b,
+            rsi,
+            cash0,
+            params[k, 3],
+            params[k, 0],
+            params[k, 1],
+            params[k, 2],
+            params[k, 4],
+            True,
+        )
+        final_value[k] = equity[-1]
+        count = 0
+        for kind in trade_kind:
+            if kind == ENTER_SHORT_A or kind == ENTER_LONG_A:
+                count += 1
+        entries[k] = count
+    return final_value, entries
@@ -14,7 +14,7 @@ spy_bars = api.get_bars("SPY", _parse_timeframe(timeframe), start=_to_rfc3339(st
 spy_df = _normalize_bars(spy_bars, "SPY")
 print(f"Got {len(spy_df)} SPY bars")
 spy_raw = save_bars(spy_df, "SPY", timeframe, "stock")
-spy_clean = clean_market_data(spy_raw)
+spy_clean = clean_market_data(spy_raw, write_parquet=True)
 print(f"Saved to: {spy_clean}")
 
 print(f"\nDownloading RSP {timeframe}...")
@@ -22,7 +22,7 @@ rsp_bars = api.get_bars("RSP", _parse_timeframe(timeframe), start=_to_rfc3339(st
 rsp_df = _normalize_bars(rsp_bars, "RSP")
 print(f"Got {len(rsp_df)} RSP bars")
 rsp_raw = save_bars(rsp_df, "RSP", timeframe, "stock")
-rsp_clean = clean_market_data(rsp_raw)
+rsp_clean = clean_market_data(rsp_raw, write_parquet=True)
 print(f"Saved to: {rsp_clean}")
 
 print(f"\n✅ {timeframe} download complete!")
@@ -63,7 +63,7 @@ def main() -> None:
     print(f"Got {len(df)} bars")
 
     raw_path = save_bars(df, symbol, timeframe, "stock")
-    clean_path = clean_market_data(raw_path)
+    clean_path = clean_market_data(raw_path, write_parquet=True)
 
     print(f"Saved: {clean_path}")
     print("\nRun backtest with:")
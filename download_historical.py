@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """Download historical SPY and RSP data with date ranges."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from pipeline.alpaca import get_rest, save_bars, clean_market_data, _parse_timeframe, _normalize_bars, _to_rfc3339
 
@@ -12,38 +14,29 @@ end = pd.Timestamp("2025-12-31", tz="UTC")
 
 print(f"Downloading data from {start.date()} to {end.date()}")
 
-# Download SPY
-print("\nDownloading SPY...")
-spy_bars = api.get_bars(
-    "SPY",
-    _parse_timeframe("1Day"),
-    start=_to_rfc3339(start),
-    end=_to_rfc3339(end),
-    limit=10000,
-    feed="iex"
-).df
-spy_df = _normalize_bars(spy_bars, "SPY")
-print(f"Got {len(spy_df)} SPY bars")
-
-spy_raw = save_bars(spy_df, "SPY", "1Day", "stock")
-spy_clean = clean_market_data(spy_raw)
-print(f"Saved to: {spy_clean}")
-
-# Download RSP
-print("\nDownloading RSP...")
-rsp_bars = api.get_bars(
-    "RSP",
-    _parse_timeframe("1Day"),
-    start=_to_rfc3339(start),
-    end=_to_rfc3339(end),
-    limit=10000,
-    feed="iex"
-).df
-rsp_df = _normalize_bars(rsp_bars, "RSP")
-print(f"Got {len(rsp_df)} RSP bars")
-
-rsp_raw = save_bars(rsp_df, "RSP", "1Day", "stock")
-rsp_clean = clean_market_data(rsp_raw)
-print(f"Saved to: {rsp_clean}")
+
+def fetch_and_save(symbol):
+    """Download, save and clean daily bars for one symbol over the date range"""
+    print(f"\nDownloading {symbol}...")
+    bars = api.get_bars(
+        symbol,
+        _parse_timeframe("1Day"),
+        start=_to_rfc3339(start),
+        end=_to_rfc3339(end),
+        limit=10000,
+        feed="iex"
+    ).df
+    df = _normalize_bars(bars, symbol)
+    print(f"Got {len(df)} {symbol} bars")
+
+    raw = save_bars(df, symbol, "1Day", "stock")
+    clean = clean_market_data(raw, write_parquet=True)
+    print(f"Saved to: {clean}")
+    return clean
+
+
+# Requests are independent and I/O bound, so fetch both symbols concurrently
+with ThreadPoolExecutor(max_workers=2) as executor:
+    list(executor.map(fetch_and_save, ["SPY", "RSP"]))
 
 print("\n✅ Historical download complete!")
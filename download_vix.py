@@ -26,7 +26,7 @@ vix_df = _normalize_bars(vix_bars, "VIX")
 print(f"Got {len(vix_df)} VIX bars")
 
 vix_raw = save_bars(vix_df, "VIX", "1Day", "stock")
-vix_clean = clean_market_data(vix_raw)
+vix_clean = clean_market_data(vix_raw, write_parquet=True)
 print(f"Saved to: {vix_clean}")
 
 print("\n✅ VIX download complete!")
@@ -8,117 +8,8 @@ import pandas as pd
 import numpy as np
 from itertools import product
 
-def calculate_rsi(prices, period=14):
-    """Calculate RSI indicator"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def backtest_parameters(spy_df, rsp_df, rsi_high, rsi_low, exit_rsi, capital_usage, stop_loss):
-    """Run backtest with given parameters"""
-    
-    # Calculate ratio and RSI
-    df = spy_df.copy()
-    df['rsp_close'] = rsp_df['Close']
-    df['ratio'] = df['Close'] / df['rsp_close']
-    df['ratio_rsi'] = calculate_rsi(df['ratio'], period=14)
-    df = df.dropna()
-    
-    # Initialize
-    portfolio = {
-        'cash': 100000,
-        'spy_shares': 0,
-        'rsp_shares': 0,
-        'equity': 100000,
-        'entry_value': 0
-    }
-    
-    current_position = None
-    trades = 0
-    
-    for idx, row in df.iterrows():
-        spy_price = row['Close']
-        rsp_price = row['rsp_close']
-        ratio_rsi = row['ratio_rsi']
-        
-        # Calculate portfolio value
-        portfolio_value = portfolio['cash'] + \
-                          portfolio['spy_shares'] * spy_price + \
-                          portfolio['rsp_shares'] * rsp_price
-        portfolio['equity'] = portfolio_value
-        
-        # Check stop loss
-        if current_position is not None and portfolio['entry_value'] > 0:
-            pnl_pct = (portfolio_value - portfolio['entry_value']) / portfolio['entry_value']
-            if pnl_pct <= -stop_loss:
-                # Stop loss hit - close position
-                portfolio['cash'] += portfolio['spy_shares'] * spy_price
-                portfolio['cash'] += portfolio['rsp_shares'] * rsp_price
-                portfolio['spy_shares'] = 0
-                portfolio['rsp_shares'] = 0
-                current_position = None
-                portfolio['entry_value'] = 0
-                continue
-        
-        # Exit logic
-        if current_position is not None:
-            should_exit = False
-            
-            if current_position == 'short_spy_long_rsp' and ratio_rsi < exit_rsi:
-                should_exit = True
-            elif current_position == 'long_spy_short_rsp' and ratio_rsi > (100 - exit_rsi):
-                should_exit = True
-            
-            if should_exit:
-                portfolio['cash'] += portfolio['spy_shares'] * spy_price
-                portfolio['cash'] += portfolio['rsp_shares'] * rsp_price
-                portfolio['spy_shares'] = 0
-                portfolio['rsp_shares'] = 0
-                current_position = None
-                portfolio['entry_value'] = 0
-        
-        # Entry logic
-        if current_position is None:
-            position_size = portfolio_value * capital_usage / 2
-            
-            if ratio_rsi > rsi_high:
-                # Short SPY, Long RSP
-                spy_shares = -(position_size // spy_price)
-                rsp_shares = position_size // rsp_price
-                
-                portfolio['spy_shares'] = spy_shares
-                portfolio['rsp_shares'] = rsp_shares
-                portfolio['cash'] -= (rsp_shares * rsp_price)
-                portfolio['cash'] += (-spy_shares * spy_price)
-                portfolio['entry_value'] = portfolio_value
-                current_position = 'short_spy_long_rsp'
-                trades += 1
-                
-            elif ratio_rsi < rsi_low:
-                # Long SPY, Short RSP
-                spy_shares = position_size // spy_price
-                rsp_shares = -(position_size // rsp_price)
-                
-                portfolio['spy_shares'] = spy_shares
-                portfolio['rsp_shares'] = rsp_shares
-                portfolio['cash'] -= (spy_shares * spy_price)
-                portfolio['cash'] += (-rsp_shares * rsp_price)
-                portfolio['entry_value'] = portfolio_value
-                current_position = 'long_spy_short_rsp'
-                trades += 1
-    
-    # Final results
-    final_value = portfolio['equity']
-    total_return = (final_value - 100000) / 100000
-    
-    return {
-        'final_value': final_value,
-        'return_pct': total_return * 100,
-        'trades': trades
-    }
+from core.simulate import sweep
+from strategies.indicators import ratio_rsi
 
 # Load data
 print("Loading SPY and RSP 1-hour data...")
@@ -130,6 +21,20 @@ common_dates = spy_df.index.intersection(rsp_df.index)
 spy_df = spy_df.loc[common_dates]
 rsp_df = rsp_df.loc[common_dates]
 
+# Calculate ratio and RSI once; every parameter set shares them
+df = spy_df.copy()
+df['rsp_close'] = rsp_df['Close']
+df['ratio'] = df['Close'] / df['rsp_close']
+# Same Wilder RSI as backtest_pair and run_live_pair, so tuned thresholds carry over
+df['ratio_rsi'] = ratio_rsi(
+    df['Close'].to_numpy(dtype=np.float64), df['rsp_close'].to_numpy(dtype=np.float64), 14
+)
+df = df.dropna()
+
+spy_close = df['Close'].to_numpy(dtype=np.float64)
+rsp_close = df['rsp_close'].to_numpy(dtype=np.float64)
+rsi = df['ratio_rsi'].to_numpy(dtype=np.float64)
+
 print(f"Testing on {len(spy_df)} bars (2024-2025)")
 print("\nOptimizing parameters...")
 print("="*80)
@@ -141,34 +46,21 @@ exit_rsis = [45, 50, 55]                # Exit at this RSI level
 capital_usages = [0.50, 0.70, 0.90]    # % of capital per trade
 stop_losses = [0.01, 0.02, 0.03]       # Stop loss %
 
-# Store results
-results = []
-
-total_combinations = len(list(product(rsi_highs, rsi_lows, exit_rsis, capital_usages, stop_losses)))
-print(f"Testing {total_combinations} parameter combinations...\n")
-
-count = 0
-for rsi_high, rsi_low, exit_rsi, capital_usage, stop_loss in product(rsi_highs, rsi_lows, exit_rsis, capital_usages, stop_losses):
-    count += 1
-    
-    result = backtest_parameters(spy_df, rsp_df, rsi_high, rsi_low, exit_rsi, capital_usage, stop_loss)
-    
-    results.append({
-        'rsi_high': rsi_high,
-        'rsi_low': rsi_low,
-        'exit_rsi': exit_rsi,
-        'capital_usage': capital_usage,
-        'stop_loss': stop_loss,
-        'return': result['return_pct'],
-        'trades': result['trades'],
-        'final_value': result['final_value']
-    })
-    
-    if count % 50 == 0:
-        print(f"Progress: {count}/{total_combinations} tested...")
-
-# Convert to DataFrame and sort by return
-results_df = pd.DataFrame(results)
+combinations = list(product(rsi_highs, rsi_lows, exit_rsis, capital_usages, stop_losses))
+print(f"Testing {len(combinations)} parameter combinations...\n")
+
+# Run every combination in parallel
+params = np.array(combinations, dtype=np.float64)
+final_values, trade_counts = sweep(spy_close, rsp_close, rsi, 100000.0, params)
+
+results_df = pd.DataFrame(
+    combinations, columns=['rsi_high', 'rsi_low', 'exit_rsi', 'capital_usage', 'stop_loss']
+)
+results_df['return'] = (final_values - 100000) / 100000 * 100
+results_df['trades'] = trade_counts
+results_df['final_value'] = final_values
+
+# Sort by return
 results_df = results_df.sort_values('return', ascending=False)
 
 print("\n" + "="*80)
@@ -6,18 +6,22 @@ from __future__ import annotations
 
 import os
 from datetime import timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import alpaca_trade_api as tradeapi
 import pandas as pd
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 DATA_DIR = Path("data")
 DEFAULT_BASE_URL = "https://paper-api.alpaca.markets"
 DEFAULT_DATA_FEED = "iex"
 DEFAULT_FALLBACK_DAYS = 10
+HTTP_POOL_SIZE = 16
 
 
 def _ensure_dir(path: Path) -> Path:
@@ -60,14 +64,30 @@ def _to_rfc3339(ts: pd.Timestamp) -> str:
     return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+@lru_cache(maxsize=1)
 def get_rest() -> tradeapi.REST:
+    """
+    Return the process-wide Alpaca REST client.
+
+    The client is built once so every caller shares one keep-alive connection
+    pool. Connection errors are retried by the adapter; HTTP 429/504 retries
+    stay with the client itself.
+    """
     _load_env()
     api_key = _require_env("ALPACA_API_KEY")
     api_secret = _require_env("ALPACA_API_SECRET")
     base_url = os.environ.get("ALPACA_API_URL", DEFAULT_BASE_URL).rstrip("/")
     if not base_url:
         base_url = DEFAULT_BASE_URL
-    return tradeapi.REST(api_key, api_secret, base_url, api_version="v2")
+    api = tradeapi.REST(api_key, api_secret, base_url, api_version="v2")
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=5, backoff_factor=0.3),
+    )
+    api._session.mount("https://", adapter)
+    api._session.mount("http://", adapter)
+    return api
 
 
 def _normalize_bars(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
@@ -198,9 +218,13 @@ def clean_market_data(
     csv_path: Path,
     dest_dir: Optional[Path] = None,
     add_features: bool = True,
+    write_parquet: bool = False,
 ) -> Path:
     """
     Clean Alpaca candle data and optionally add derived features.
+
+    With write_parquet, a Parquet copy is saved next to the clean CSV; the
+    backtests read it in preference to re-parsing the CSV.
     """
     df = pd.read_csv(csv_path)
     if "Datetime" not in df.columns:
@@ -224,4 +248,6 @@ def clean_market_data(
     stem = Path(csv_path).stem.replace("_raw", "")
     out_path = dest_dir / f"{stem}_clean.csv"
     df.to_csv(out_path)
+    if write_parquet:
+        df.reset_index().to_parquet(out_path.with_suffix(".parquet"), compression="zstd", index=False)
     return out_path
@@ -139,7 +139,7 @@ def main() -> None:
         df = trader.run_once()
         if args.save_data and df is not None:
             raw_path = save_bars(df, args.symbol, args.timeframe, args.asset_class)
-            clean_market_data(raw_path)
+            clean_market_data(raw_path, write_parquet=True)
 
     def print_summary() -> None:
         summary = trade_logger.get_session_summary(start_equity)
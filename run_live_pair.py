@@ -1,23 +1,23 @@
 import time
+from collections import deque
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timezone
 from pipeline.alpaca import get_rest
-
-def calculate_rsi(prices, period=14):
-    """Calculate RSI"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+from strategies.indicators import rolling_mean_std, warmup
+from strategies.live import BarBuffer, RatioRSI
 
 # Strategy parameters
 RSI_OVERBOUGHT = 70
 RSI_OVERSOLD = 30
 CAPITAL_USAGE = 0.90
+RSI_PERIOD = 14
 LOOKBACK_BARS = 100
+VRP_LOOKBACK_BARS = 85
 VRP_PANIC_THRESHOLD = -1.5 # The "Kill Switch" level
+VRP_VOL_WINDOW = 21
+VRP_Z_WINDOW = 63
 
 print("="*60)
 print("LIVE SPY/RSP PAIR TRADING STRATEGY + VRP HEDGE")
@@ -26,6 +26,23 @@ print("="*60)
 # Connect to Alpaca
 api = get_rest()
 
+# Load the compiled RSI/VRP kernels now rather than on the first tick
+warmup()
+
+# Seed bar history once; each tick only fetches the newest bars
+spy_5min = BarBuffer(api, 'SPY', '5Min', LOOKBACK_BARS, pd.Timedelta(days=7))
+rsp_5min = BarBuffer(api, 'RSP', '5Min', LOOKBACK_BARS, pd.Timedelta(days=7))
+spy_daily = BarBuffer(api, 'SPY', '1Day', VRP_LOOKBACK_BARS, pd.Timedelta(days=150))
+# Note: If your Alpaca tier supports ^VIX, use that; otherwise VIXY/VXX
+vix_daily = BarBuffer(api, 'VIXY', '1Day', VRP_LOOKBACK_BARS, pd.Timedelta(days=150))
+
+# SPY/RSP ratio RSI, updated incrementally each tick
+ratio_rsi_state = RatioRSI(RSI_PERIOD)
+
+# Last VRP_Z_WINDOW daily VRP values for the z-score
+vrp_values = deque(maxlen=VRP_Z_WINDOW)
+vrp_state = {'time': None}
+
 # State tracking
 current_position = None 
 
@@ -42,33 +59,48 @@ def get_current_price(symbol):
 def get_vrp_z_score():
     """Calculates the Volatility Risk Premium Z-Score"""
     try:
-        # Fetch data for VRP (SPY for realized vol, VIXY as VIX proxy)
-        spy_bars = api.get_bars('SPY', '1Day', limit=85).df
-        # Note: If your Alpaca tier supports ^VIX, use that; otherwise VIXY/VXX
-        vix_bars = api.get_bars('VIXY', '1Day', limit=85).df 
+        # VRP inputs: SPY for realized vol, VIXY as VIX proxy
+        spy_daily.refresh()
+        vix_daily.refresh()
         
-        returns = spy_bars['close'].pct_change()
-        realized_vol = returns.rolling(21).std() * np.sqrt(252) * 100
-        vrp = vix_bars['close'] - realized_vol
+        # VRP on every day both buffers hold
+        spy_times, spy_close = spy_daily.arrays()
+        vix_times, vix_close = vix_daily.arrays()
+        returns = np.full(spy_close.shape[0], np.nan)
+        returns[1:] = spy_close[1:] / spy_close[:-1] - 1
+        _, returns_std = rolling_mean_std(returns, VRP_VOL_WINDOW)
+        times, spy_idx, vix_idx = np.intersect1d(spy_times, vix_times, assume_unique=True, return_indices=True)
+        vrp = vix_close[vix_idx] - returns_std[spy_idx] * np.sqrt(252) * 100
+        valid = ~np.isnan(vrp)
+        times, vrp = times[valid], vrp[valid]
         
-        vrp_mean = vrp.rolling(63).mean()
-        vrp_std = vrp.rolling(63).std()
+        if vrp_state['time'] is None or vrp_state['time'] < times[0]:
+            # Seed (or reseed after an outage longer than the buffers) from the buffered history
+            vrp_values.clear()
+            vrp_values.extend(vrp[-VRP_Z_WINDOW:])
+        else:
+            # Re-apply the last committed day, which may have been revised, then
+            # append every aligned day since; a lagging VIXY bar lands a tick later
+            start = np.searchsorted(times, vrp_state['time'])
+            if times[start] == vrp_state['time']:
+                vrp_values[-1] = vrp[start]
+                start += 1
+            vrp_values.extend(vrp[start:])
+        vrp_state['time'] = times[-1]
         
-        z_score = (vrp.iloc[-1] - vrp_mean.iloc[-1]) / vrp_std.iloc[-1]
+        if len(vrp_values) < VRP_Z_WINDOW:
+            return np.nan
+        window = np.fromiter(vrp_values, dtype=np.float64, count=len(vrp_values))
+        z_score = (window[-1] - window.mean()) / window.std(ddof=1)
         return z_score
     except Exception as e:
         print(f"VRP Calculation Error: {e}")
         return 0.0 # Default to neutral if calculation fails
 
 def get_ratio_rsi():
-    spy_bars = api.get_bars('SPY', '5Min', limit=LOOKBACK_BARS).df
-    rsp_bars = api.get_bars('RSP', '5Min', limit=LOOKBACK_BARS).df
-    common_idx = spy_bars.index.intersection(rsp_bars.index)
-    spy_bars = spy_bars.loc[common_idx]
-    rsp_bars = rsp_bars.loc[common_idx]
-    ratio = spy_bars['close'] / rsp_bars['close']
-    rsi = calculate_rsi(ratio, period=14)
-    return rsi.iloc[-1] if not rsi.empty else None
+    spy_5min.refresh()
+    rsp_5min.refresh()
+    return ratio_rsi_state.update(spy_5min, rsp_5min)
 
 def close_all_positions():
     global current_position
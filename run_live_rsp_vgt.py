@@ -4,26 +4,41 @@ LIVE RSP/VGT Pair Trading Strategy
 Optimized parameters: 65/30/50, 90% capital
 """
 
-import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timezone
+from core.logger import get_logger
 from pipeline.alpaca import get_rest
+from strategies.indicators import warmup
+from strategies.live import BarBuffer, RatioRSI
 
 # OPTIMIZED PARAMETERS
 RSI_ENTRY_HIGH = 65
 RSI_ENTRY_LOW = 30
 RSI_EXIT = 50
 CAPITAL_USAGE = 0.90
+RSI_PERIOD = 14
 LOOKBACK_BARS = 100
+SEED_HISTORY = pd.Timedelta(days=30)  # Calendar span that holds at least LOOKBACK_BARS hourly bars
+POLL_SECONDS = 300
+BAR_SETTLE_SECONDS = 2  # Grace after a bar boundary for Alpaca to publish the bar
+
+@dataclass(frozen=True)
+class Pair:
+    """One pair position: buy long_symbol, sell short_symbol, `weight` of deployed capital per leg"""
+    label: str
+    long_symbol: str
+    short_symbol: str
+    weight: float = 0.5
 
-def calculate_rsi(prices, period=14):
-    """Calculate RSI"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+PAIRS = {
+    'short_rsp_long_vgt': Pair('SHORT RSP / LONG VGT', long_symbol='VGT', short_symbol='RSP'),
+    'long_rsp_short_vgt': Pair('LONG RSP / SHORT VGT', long_symbol='RSP', short_symbol='VGT'),
+}
 
 print("="*60)
 print("LIVE RSP/VGT PAIR TRADING STRATEGY")
@@ -37,6 +52,22 @@ print("="*60)
 # Connect to Alpaca
 api = get_rest()
 
+# Load the compiled RSI kernels now rather than on the first tick
+warmup()
+
+# %-style arguments are only formatted when a handler takes the record
+logger = get_logger("run_live_rsp_vgt")
+
+# Paired requests (both legs' bars, prices, orders) go out together instead of back to back
+executor = ThreadPoolExecutor(max_workers=4)
+
+# Seed hourly history once; each tick only fetches the newest bars
+rsp_1hour = BarBuffer(api, 'RSP', '1Hour', LOOKBACK_BARS, SEED_HISTORY)
+vgt_1hour = BarBuffer(api, 'VGT', '1Hour', LOOKBACK_BARS, SEED_HISTORY)
+
+# RSP/VGT ratio RSI, updated incrementally each tick
+ratio_rsi_state = RatioRSI(RSI_PERIOD)
+
 # State tracking
 current_position = None
 
@@ -52,100 +83,94 @@ def get_current_price(symbol):
 
 def get_ratio_rsi():
     """Get RSP/VGT ratio RSI"""
-    rsp_bars = api.get_bars('RSP', '1Hour', limit=LOOKBACK_BARS).df
-    vgt_bars = api.get_bars('VGT', '1Hour', limit=LOOKBACK_BARS).df
-    
-    common_idx = rsp_bars.index.intersection(vgt_bars.index)
-    rsp_bars = rsp_bars.loc[common_idx]
-    vgt_bars = vgt_bars.loc[common_idx]
-    
-    ratio = rsp_bars['close'] / vgt_bars['close']
-    rsi = calculate_rsi(ratio, period=14)
-    
-    return rsi.iloc[-1] if not rsi.empty else None
+    for future in [executor.submit(rsp_1hour.refresh), executor.submit(vgt_1hour.refresh)]:
+        future.result()
+    return ratio_rsi_state.update(rsp_1hour, vgt_1hour)
 
 def close_all_positions():
     global current_position
     try:
         api.close_all_positions()
-        print(f"[{datetime.now(timezone.utc)}] Closed all positions")
+        logger.info("Closed all positions")
         current_position = None
     except Exception as e:
-        print(f"Error closing positions: {e}")
+        logger.error("Error closing positions: %s", e)
+
+def submit_orders(symbols, qtys, sides):
+    """Submit one market order per leg concurrently"""
+    orders = [
+        dict(symbol=symbol, qty=int(qty), side=side, type='market', time_in_force='day')
+        for symbol, qty, side in zip(symbols, qtys, sides)
+    ]
+    for _ in executor.map(lambda order: api.submit_order(**order), orders):
+        pass
 
 def enter_trade(position_type, ratio_rsi):
     global current_position
     try:
+        pair = PAIRS[position_type]
+        symbols = [pair.long_symbol, pair.short_symbol]
         account_value = get_account_value()
-        position_size = account_value * CAPITAL_USAGE / 2
-        
-        rsp_price = get_current_price('RSP')
-        vgt_price = get_current_price('VGT')
         
-        if not rsp_price or not vgt_price:
+        # Leg prices, notionals and quantities as parallel arrays
+        prices = np.array([price or np.nan for price in executor.map(get_current_price, symbols)])
+        if not np.all(prices > 0):
             return
+        notionals = np.full(len(symbols), account_value * CAPITAL_USAGE * pair.weight)
+        qtys = np.floor_divide(notionals, prices).astype(np.int64)
         
-        rsp_qty = int(position_size / rsp_price)
-        vgt_qty = int(position_size / vgt_price)
-        
-        if position_type == 'short_rsp_long_vgt':
-            # Short RSP, Long VGT
-            api.submit_order(symbol='RSP', qty=rsp_qty, side='sell', type='market', time_in_force='day')
-            api.submit_order(symbol='VGT', qty=vgt_qty, side='buy', type='market', time_in_force='day')
-            print(f"\n[{datetime.now(timezone.utc)}] ENTERED: SHORT RSP / LONG VGT")
-            
-        elif position_type == 'long_rsp_short_vgt':
-            # Long RSP, Short VGT
-            api.submit_order(symbol='RSP', qty=rsp_qty, side='buy', type='market', time_in_force='day')
-            api.submit_order(symbol='VGT', qty=vgt_qty, side='sell', type='market', time_in_force='day')
-            print(f"\n[{datetime.now(timezone.utc)}] ENTERED: LONG RSP / SHORT VGT")
-        
-        print(f"  RSI: {ratio_rsi:.2f}")
-        print(f"  Size: ${position_size*2:,.0f}")
+        submit_orders(symbols, qtys, ['buy', 'sell'])
+        logger.info("ENTERED: %s | RSI: %.2f | Size: $%.0f", pair.label, ratio_rsi, notionals.sum())
         current_position = position_type
         
     except Exception as e:
-        print(f"Error entering trade: {e}")
+        logger.error("Error entering trade: %s", e)
 
-# Main loop
-print("\nStarting live trading loop...")
-print("Press Ctrl+C to stop\n")
+def seconds_to_next_poll(now):
+    """Seconds until just after the next POLL_SECONDS boundary; every hourly close lands on one"""
+    return POLL_SECONDS - now.timestamp() % POLL_SECONDS + BAR_SETTLE_SECONDS
 
-try:
+async def main():
     while True:
-        now = datetime.now(timezone.utc)
-        ratio_rsi = get_ratio_rsi()
+        ratio_rsi = await asyncio.to_thread(get_ratio_rsi)
         
         if ratio_rsi is None:
-            print(f"[{now}] Waiting for data...")
-            time.sleep(300)
+            logger.info("Waiting for data...")
+            await asyncio.sleep(seconds_to_next_poll(datetime.now(timezone.utc)))
             continue
         
-        print(f"[{now}] Ratio RSI: {ratio_rsi:.2f} | Position: {current_position or 'None'}")
+        logger.info("Ratio RSI: %.2f | Position: %s", ratio_rsi, current_position or 'None')
         
         # Exit logic
         if current_position == 'short_rsp_long_vgt' and ratio_rsi < RSI_EXIT:
-            print(f"  → EXIT SIGNAL (RSI < {RSI_EXIT})")
-            close_all_positions()
+            logger.info("  → EXIT SIGNAL (RSI < %s)", RSI_EXIT)
+            await asyncio.to_thread(close_all_positions)
             
         elif current_position == 'long_rsp_short_vgt' and ratio_rsi > (100 - RSI_EXIT):
-            print(f"  → EXIT SIGNAL (RSI > {100 - RSI_EXIT})")
-            close_all_positions()
+            logger.info("  → EXIT SIGNAL (RSI > %s)", 100 - RSI_EXIT)
+            await asyncio.to_thread(close_all_positions)
         
         # Entry logic
         elif current_position is None:
             if ratio_rsi > RSI_ENTRY_HIGH:
-                print(f"  → ENTRY SIGNAL: RSI > {RSI_ENTRY_HIGH}")
-                enter_trade('short_rsp_long_vgt', ratio_rsi)
+                logger.info("  → ENTRY SIGNAL: RSI > %s", RSI_ENTRY_HIGH)
+                await asyncio.to_thread(enter_trade, 'short_rsp_long_vgt', ratio_rsi)
                 
             elif ratio_rsi < RSI_ENTRY_LOW:
-                print(f"  → ENTRY SIGNAL: RSI < {RSI_ENTRY_LOW}")
-                enter_trade('long_rsp_short_vgt', ratio_rsi)
-        
-        # Check every 5 minutes
-        time.sleep(300)
+                logger.info("  → ENTRY SIGNAL: RSI < %s", RSI_ENTRY_LOW)
+                await asyncio.to_thread(enter_trade, 'long_rsp_short_vgt', ratio_rsi)
         
+        # Wake on the next 5-minute boundary, which includes each hourly bar close
+        await asyncio.sleep(seconds_to_next_poll(datetime.now(timezone.utc)))
+
+# Main loop
+print("\nStarting live trading loop...")
+print("Press Ctrl+C to stop\n")
+
+try:
+    asyncio.run(main())
 except KeyboardInterrupt:
     print("\n\nStopping strategy...")
     close_all_positions()
+    executor.shutdown(wait=True)
     print("✓ Strategy stopped")
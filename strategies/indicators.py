@@ -0,0 +1,290 @@
+"""
+Shared technical indicators compiled with numba.
+
+The Wilder averages reproduce pandas' ``ewm(alpha=1/period, adjust=False)``
+update bit-for-bit, so switching a caller from the pandas version does not
+move any RSI values.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from core._njit import njit, prange
+
+
+def as_f64(values):
+    """Contiguous float64 array for a kernel input, copying only when the source isn't one already"""
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+
+
+@njit(cache=True)
+def wilder_averages(prices, period=14):
+    """Wilder-smoothed average gain and loss at every bar (NaN at bar 0)"""
+    n = prices.shape[0]
+    avg_gain = np.full(n, np.nan)
+    avg_loss = np.full(n, np.nan)
+    if n < 2:
+        return avg_gain, avg_loss
+
+    alpha = 1.0 / period
+    old_wt = 1.0 - alpha
+    delta = prices[1] - prices[0]
+    g = max(delta, 0.0)
+    l = max(-delta, 0.0)
+    avg_gain[1] = g
+    avg_loss[1] = l
+    for i in range(2, n):
+        delta = prices[i] - prices[i - 1]
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        if g != gain:
+            g = (old_wt * g + alpha * gain) / (old_wt + alpha)
+        if l != loss:
+            l = (old_wt * l + alpha * loss) / (old_wt + alpha)
+        avg_gain[i] = g
+        avg_loss[i] = l
+    return avg_gain, avg_loss
+
+
+@njit(cache=True)
+def wilder_step(avg_gain, avg_loss, delta, period=14):
+    """Advance Wilder's average gain/loss by one price change"""
+    avg_gain = (avg_gain * (period - 1) + max(delta, 0.0)) / period
+    avg_loss = (avg_loss * (period - 1) + max(-delta, 0.0)) / period
+    return avg_gain, avg_loss
+
+
+@njit(cache=True)
+def rsi(prices, period=14):
+    """Wilder RSI; the first `period` bars are NaN"""
+    avg_gain, avg_loss = wilder_averages(prices, period)
+    out = np.full(prices.shape[0], np.nan)
+    for i in range(period, prices.shape[0]):
+        if avg_loss[i] == 0.0:
+            if avg_gain[i] > 0.0:
+                out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain[i] / avg_loss[i])
+    return out
+
+
+@njit(parallel=True, cache=True)
+def rsi_columns(prices, period=14):
+    """
+    Wilder RSI of each column of a 2D price array, one column per thread.
+
+    Pass a column-major (Fortran-ordered) array to avoid a copy per column.
+    """
+    out = np.empty(prices.shape)
+    for j in prange(prices.shape[1]):
+        out[:, j] = rsi(np.ascontiguousarray(prices[:, j]), period)
+    return out
+
+
+def make_rsi(period):
+    """
+    Build an RSI kernel with `period` baked in as a compile-time constant.
+
+    Same values as rsi(prices, period), but the smoothing weights are
+    constants LLVM can fold instead of being derived from an argument.
+    """
+    alpha = 1.0 / period
+    old_wt = 1.0 - alpha
+    norm = old_wt + alpha
+
+    @njit(cache=True)
+    def rsi_kernel(prices):
+        n = prices.shape[0]
+        out = np.full(n, np.nan)
+        if n < 2:
+            return out
+        delta = prices[1] - prices[0]
+        g = max(delta, 0.0)
+        l = max(-delta, 0.0)
+        for i in range(1, n):
+            if i > 1:
+                delta = prices[i] - prices[i - 1]
+                gain = max(delta, 0.0)
+                loss = max(-delta, 0.0)
+                if g != gain:
+                    g = (old_wt * g + alpha * gain) / norm
+                if l != loss:
+                    l = (old_wt * l + alpha * loss) / norm
+            if i >= period:
+                if l == 0.0:
+                    if g > 0.0:
+                        out[i] = 100.0
+                else:
+                    out[i] = 100.0 - 100.0 / (1.0 + g / l)
+        return out
+
+    return rsi_kernel
+
+
+# Period 14 is the default everywhere in this codebase
+rsi14 = make_rsi(14)
+
+
+def ratio_rsi(a, b, period=14):
+    """Wilder RSI of the price ratio a / b"""
+    ratio = a / b
+    return rsi14(ratio) if period == 14 else rsi(ratio, period)
+
+
+@njit(cache=True)
+def rolling_mean_std(values, window):
+    """
+    Rolling mean and sample std (ddof=1) in one pass.
+
+    Matches pandas' rolling(window).mean()/.std(): a bar is NaN unless all
+    `window` values ending at it are valid.
+    """
+    n = values.shape[0]
+    mean_out = np.full(n, np.nan)
+    std_out = np.full(n, np.nan)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    for i in range(n):
+        x = values[i]
+        if x == x:
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            ssqdm += delta * (x - mean)
+        if i >= window:
+            y = values[i - window]
+            if y == y:
+                nobs -= 1
+                if nobs > 0:
+                    delta = y - mean
+                    mean -= delta / nobs
+                    ssqdm -= delta * (y - mean)
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+        if nobs == window:
+            mean_out[i] = mean
+            std_out[i] = np.sqrt(max(ssqdm, 0.0) / (window - 1))
+    return mean_out, std_out
+
+
+@njit(cache=True)
+def rolling_zscore(values, window):
+    """Rolling mean, sample std and z-score; z is 0 wherever it is undefined"""
+    mean, std = rolling_mean_std(values, window)
+    z = np.zeros(values.shape[0])
+    for i in range(values.shape[0]):
+        if std[i] > 0.0:
+            zi = (values[i] - mean[i]) / std[i]
+            if np.isfinite(zi):
+                z[i] = zi
+    return mean, std, z
+
+
+@njit(cache=True)
+def carry_signal(signal, flat):
+    """
+    Hold the last non-zero signal as the position.
+
+    Bars where `flat` is set report a zero position without forgetting the
+    held signal, so the position resumes once the mask clears.
+    """
+    position = np.empty_like(signal)
+    last = 0
+    for i in range(signal.shape[0]):
+        if signal[i] != 0:
+            last = signal[i]
+        position[i] = 0 if flat[i] else last
+    return position
+
+
+# numpy error model so a zero price gives inf like the array division did
+@njit(cache=True, error_model="numpy")
+def zscore_pipeline(close, rsp_close, window, entry_z, exit_z):
+    """
+    Ratio z-score, entry signal and carried position in a single pass.
+
+    Same values as rolling_zscore on close / rsp_close followed by the
+    threshold signal and carry_signal with an |z| < exit_z mask. z is
+    rounded to float32 before the thresholds are applied, as it is stored.
+    """
+    n = close.shape[0]
+    z_out = np.zeros(n, dtype=np.float32)
+    signal = np.zeros(n, dtype=np.int8)
+    position = np.zeros(n, dtype=np.int8)
+    hi = np.float32(entry_z)
+    lo = np.float32(exit_z)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    last = 0
+    for i in range(n):
+        x = close[i] / rsp_close[i]
+        if x == x:
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            ssqdm += delta * (x - mean)
+        if i >= window:
+            y = close[i - window] / rsp_close[i - window]
+            if y == y:
+                nobs -= 1
+                if nobs > 0:
+                    delta = y - mean
+                    mean -= delta / nobs
+                    ssqdm -= delta * (y - mean)
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+
+        z = np.float32(0.0)
+        if nobs == window:
+            std = np.sqrt(max(ssqdm, 0.0) / (window - 1))
+            if std > 0.0:
+                zi = (x - mean) / std
+                if np.isfinite(zi):
+                    z = np.float32(zi)
+        z_out[i] = z
+
+        if z < -hi:
+            signal[i] = 1
+            last = 1
+        elif z > hi:
+            signal[i] = -1
+            last = -1
+        position[i] = 0 if abs(z) < lo else last
+    return z_out, signal, position
+
+
+def warmup():
+    """
+    Compile (or load from the on-disk cache) the kernels the live runners call:
+    wilder_averages and wilder_step for the ratio RSI, rolling_mean_std for VRP.
+
+    Call once at startup so the first tick doesn't pay for JIT compilation.
+    The arguments use the same types as the real calls, so no later call
+    triggers another specialisation.
+    """
+    prices = np.linspace(1.0, 2.0, 32)
+    wilder_averages(prices, 14)
+    wilder_step(prices[0], prices[1], prices[2] - prices[1], 14)
+    rolling_mean_std(prices, 5)
+
+
+__all__ = [
+    "as_f64",
+    "wilder_averages",
+    "wilder_step",
+    "rsi",
+    "rsi_columns",
+    "make_rsi",
+    "rsi14",
+    "ratio_rsi",
+    "rolling_mean_std",
+    "rolling_zscore",
+    "carry_signal",
+    "zscore_pipeline",
+    "warmup",
+]
@@ -0,0 +1,107 @@
+"""
+Incremental bar and indicator state shared by the live pair runners.
+
+Each tick only fetches the bars published since the last one and folds them
+into the running Wilder averages, instead of re-downloading and re-smoothing
+the whole lookback window.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from pipeline.alpaca import _to_rfc3339
+from strategies.indicators import wilder_averages, wilder_step
+
+
+class BarBuffer:
+    """
+    Rolling window of closes for one symbol, seeded once and topped up each tick.
+
+    Alpaca returns bars in ascending order from `start` (the start of today
+    when omitted), so every fetch is anchored on an explicit start.
+    """
+
+    def __init__(self, api, symbol, timeframe, maxlen, history):
+        self.api = api
+        self.symbol = symbol
+        self.timeframe = timeframe
+        # Seed from a calendar span that holds at least maxlen bars; the deque keeps the newest
+        self.start = pd.Timestamp.now(tz='UTC') - history
+        self.times = deque(maxlen=maxlen)
+        self.closes = deque(maxlen=maxlen)
+        self.refresh()
+
+    def refresh(self):
+        # Start at the newest buffered bar: picks up a revised last bar and
+        # every bar since, however many polls were missed
+        start = self.times[-1] if self.times else self.start
+        bars = self.api.get_bars(self.symbol, self.timeframe, start=_to_rfc3339(start)).df
+        for ts, close in zip(bars.index, bars['close']):
+            if not self.times or ts > self.times[-1]:
+                self.times.append(ts)
+                self.closes.append(close)
+            elif ts == self.times[-1]:
+                self.closes[-1] = close
+
+    def arrays(self):
+        """Bar times as int64 nanoseconds and closes as float64"""
+        times = np.fromiter((ts.value for ts in self.times), dtype=np.int64, count=len(self.times))
+        closes = np.fromiter(self.closes, dtype=np.float64, count=len(self.closes))
+        return times, closes
+
+
+class RatioRSI:
+    """
+    Wilder RSI of the close ratio of two BarBuffers, updated incrementally.
+
+    The averages are committed through the second-to-last shared bar, so a
+    revised newest bar is re-applied rather than double counted.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.avg_gain = None
+        self.avg_loss = None
+        self.ratio = None
+        self.time = None
+
+    def update(self, numerator, denominator):
+        """Current RSI of numerator / denominator, or None until enough bars are shared"""
+        num_times, num_close = numerator.arrays()
+        den_times, den_close = denominator.arrays()
+        times, num_idx, den_idx = np.intersect1d(
+            num_times, den_times, assume_unique=True, return_indices=True
+        )
+        ratio = num_close[num_idx] / den_close[den_idx]
+        if len(ratio) <= self.period:
+            return None
+
+        start = 0 if self.time is None else np.searchsorted(times, self.time, side='right')
+        if start == 0:
+            # First tick, or the committed bar has rolled out of the window
+            settled = ratio[:-1]
+            avg_gain, avg_loss = wilder_averages(settled, self.period)
+            self.avg_gain, self.avg_loss = avg_gain[-1], avg_loss[-1]
+        else:
+            # Fold in bars that settled since the last tick
+            settled = ratio[start - 1:-1]
+            for prev, curr in zip(settled[:-1], settled[1:]):
+                self.avg_gain, self.avg_loss = wilder_step(
+                    self.avg_gain, self.avg_loss, curr - prev, self.period
+                )
+        self.ratio = settled[-1]
+        self.time = times[-2]
+
+        avg_gain, avg_loss = wilder_step(
+            self.avg_gain, self.avg_loss, ratio[-1] - self.ratio, self.period
+        )
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+__all__ = ["BarBuffer", "RatioRSI"]
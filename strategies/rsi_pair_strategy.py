@@ -1,5 +1,13 @@
 import pandas as pd
 import numpy as np
+from strategies.indicators import (
+    as_f64,
+    carry_signal,
+    rolling_mean_std,
+    rsi as wilder_rsi,
+    rsi14,
+    rsi_columns,
+)
 from strategies.strategy_base import Strategy
 
 class RSIPairStrategy(Strategy):
@@ -22,13 +30,10 @@ class RSIPairStrategy(Strategy):
         self.position_size = position_size
         
     def calculate_rsi(self, prices, period=14):
-        """Calculate RSI indicator"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        """Calculate RSI indicator (Wilder's smoothing)"""
+        values = as_f64(prices)
+        rsi = rsi14(values) if period == 14 else wilder_rsi(values, period)
+        return pd.Series(rsi, index=prices.index)
     
     def add_indicators(self, df):
         """Add RSI indicator to dataframe"""
@@ -42,18 +47,19 @@ class RSIPairStrategy(Strategy):
         signal = -1: Short position
         signal = 0: No position
         """
-        df['signal'] = 0
+        rsi = df['rsi'].to_numpy()
         
-        # Short when RSI > threshold
-        df.loc[df['rsi'] > self.rsi_threshold, 'signal'] = -1
-        
-        # Long when RSI < (100 - threshold) 
-        df.loc[df['rsi'] < (100 - self.rsi_threshold), 'signal'] = 1
+        # Short when RSI > threshold, long when RSI < (100 - threshold)
+        signal = np.select(
+            [rsi < (100 - self.rsi_threshold), rsi > self.rsi_threshold], [1, -1], default=0
+        ).astype(np.int8)
         
         # Forward fill to maintain position
-        df['position'] = df['signal'].replace(0, np.nan).ffill().fillna(0)
+        position = carry_signal(signal, np.zeros(signal.shape[0], dtype=np.bool_))
         
-        # Set target quantity
+        # Write the finished arrays straight into the frame run() already copied
+        df['signal'] = signal
+        df['position'] = position
         df['target_qty'] = self.position_size
         
         return df
@@ -78,55 +84,58 @@ class VRPAdaptivePairStrategy(Strategy):
         self.vrp_window = vrp_window
 
     def add_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        # 1. RSI for Relative Strength (RSP vs SPY)
+        # 1. RSI for Relative Strength (RSP vs SPY), both columns in one kernel call
         # Note: Assumes columns 'Close' (RSP) and 'Close_SPY' exist
-        for col, name in [('Close', 'rsp'), ('Close_SPY', 'spy')]:
-            delta = df[col].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=self.rsi_period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=self.rsi_period).mean()
-            rs = gain / loss
-            df[f'rsi_{name}'] = 100 - (100 / (1 + rs))
+        rsp_close = as_f64(df['Close'])
+        spy_close = as_f64(df['Close_SPY'])
+        # Column-major stack so each column reaches the kernel as a contiguous array
+        rsi = rsi_columns(np.vstack([rsp_close, spy_close]).T, self.rsi_period)
 
         # 2. VRP Calculation: (VIX - Annualized Realized Vol of SPY)
         # Assumes 'Close_VIX' exists in df
-        spy_returns = df['Close_SPY'].pct_change()
-        realized_vol = spy_returns.rolling(self.vrp_window).std() * np.sqrt(252) * 100
-        df['vrp'] = df['Close_VIX'] - realized_vol
+        spy_returns = np.full(spy_close.shape[0], np.nan)
+        spy_returns[1:] = spy_close[1:] / spy_close[:-1] - 1.0
+        _, returns_std = rolling_mean_std(spy_returns, self.vrp_window)
+        vrp = as_f64(df['Close_VIX']) - returns_std * np.sqrt(252) * 100
        
         # 3. VRP Z-Score (Regime Detection)
-        df['vrp_z'] = (df['vrp'] - df['vrp'].rolling(63).mean()) / df['vrp'].rolling(63).std()
+        vrp_mean, vrp_std = rolling_mean_std(vrp, 63)
+       
+        df['rsi_rsp'] = rsi[:, 0]
+        df['rsi_spy'] = rsi[:, 1]
+        df['vrp'] = vrp
+        df['vrp_z'] = (vrp - vrp_mean) / vrp_std
        
         return df
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        df['signal'] = 0
-       
         # Define Regimes
         # Safe = VRP is positive/normal; Panic = VRP is crashing
         panic_threshold = -1.5
-        is_safe = df['vrp_z'] > panic_threshold
-        is_harvest = df['vrp_z'] > 0 # High conviction
+        vrp_z = df['vrp_z'].to_numpy()
+        is_safe = vrp_z > panic_threshold
+        is_harvest = vrp_z > 0 # High conviction
        
         # RSI Logic: If SPY is overbought (>70), we want to be Short SPY / Long RSP
         # In this primary-ticker model, signal=1 means Long RSP (and implied Short SPY)
-        buy_rsp = (df['rsi_spy'] > self.rsi_threshold) & is_safe
-        sell_rsp = (df['rsi_rsp'] > self.rsi_threshold) & is_safe
+        buy_rsp = (df['rsi_spy'].to_numpy() > self.rsi_threshold) & is_safe
+        sell_rsp = (df['rsi_rsp'].to_numpy() > self.rsi_threshold) & is_safe
        
-        # Assign Signals
-        df.loc[buy_rsp, 'signal'] = 1
-        df.loc[sell_rsp, 'signal'] = -1
+        # Assign Signals (sell_rsp takes precedence when both fire)
+        signal = np.select([sell_rsp, buy_rsp], [-1, 1], default=0).astype(np.int8)
        
         # Position Logic (Carry the signal forward)
-        df['position'] = df['signal'].replace(0, np.nan).ffill().fillna(0)
+        # Emergency Exit: If VRP enters Panic Zone, flatten everything
+        position = carry_signal(signal, ~is_safe)
        
         # Adaptive Sizing: Scale size based on VRP regime
-        df['target_qty'] = self.position_size  # Base size
-       
-        # Reduce size by 50% if VRP is fragile (0 > Z > -1.5)
-        df.loc[df['vrp_z'] <= 0, 'target_qty'] = self.position_size * 0.5
+        # Reduce size by 50% if VRP is fragile (0 > Z > -1.5); Panic Zone carries no size
+        target_qty = np.where(
+            is_safe, np.where(vrp_z <= 0, self.position_size * 0.5, self.position_size), 0.0
+        )
        
-        # Emergency Exit: If VRP enters Panic Zone, flatten everything
-        df.loc[~is_safe, 'position'] = 0
-        df.loc[~is_safe, 'target_qty'] = 0
+        df['signal'] = signal
+        df['position'] = position
+        df['target_qty'] = target_qty
        
         return df
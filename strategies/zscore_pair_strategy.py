@@ -1,9 +1,28 @@
 import numpy as np
 import pandas as pd
 
+from core._njit import njit, prange
+from strategies.indicators import as_f64, rolling_zscore, zscore_pipeline
 from strategies.strategy_base import Strategy
 
 
+@njit(parallel=True, cache=True)
+def _grid_pnl(close, rsp_close, lookbacks, entry_zs, exit_zs, position_size):
+    """Pair PnL of each (lookback, entry_z, exit_z) set, one set per thread"""
+    n = close.shape[0]
+    pnl = np.zeros(lookbacks.shape[0])
+    for k in prange(lookbacks.shape[0]):
+        _, _, position = zscore_pipeline(close, rsp_close, lookbacks[k], entry_zs[k], exit_zs[k])
+        total = 0.0
+        for i in range(1, n):
+            if position[i - 1] != 0:
+                move = (close[i] - close[i - 1]) - (rsp_close[i] - rsp_close[i - 1])
+                if move == move:
+                    total += position[i - 1] * position_size * move
+        pnl[k] = total
+    return pnl
+
+
 class ZScorePairStrategy(Strategy):
     """
     SPY/RSP mean-reversion strategy based on z-score of the SPY/RSP ratio.
@@ -16,9 +35,22 @@ class ZScorePairStrategy(Strategy):
       - z_score > entry_z: SHORT SPY, LONG RSP (signal = -1)
       - z_score < -entry_z: LONG SPY, SHORT RSP (signal = +1)
       - abs(z_score) < exit_z: CLOSE position (position = 0)
+
+    z_score is stored as float32. The ratio, ratio_mean and ratio_std columns
+    are only written when keep_debug_cols is set.
+
+    z_score, signal and position come out of one fused pass in
+    add_indicators; generate_signals only sizes the legs from position.
     """
 
-    def __init__(self, lookback: int = 60, entry_z: float = 2.0, exit_z: float = 0.5, position_size: float = 10.0):
+    def __init__(
+        self,
+        lookback: int = 60,
+        entry_z: float = 2.0,
+        exit_z: float = 0.5,
+        position_size: float = 10.0,
+        keep_debug_cols: bool = False,
+    ):
         if lookback < 2:
             raise ValueError("lookback must be at least 2.")
         if entry_z <= 0:
@@ -33,40 +65,75 @@ class ZScorePairStrategy(Strategy):
         self.entry_z = entry_z
         self.exit_z = exit_z
         self.position_size = position_size
+        self.keep_debug_cols = keep_debug_cols
 
     def add_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         if "rsp_close" not in df.columns:
             raise ValueError("ZScorePairStrategy requires a 'rsp_close' column with RSP prices.")
 
-        ratio = df["Close"] / df["rsp_close"]
-        mean = ratio.rolling(self.lookback).mean()
-        std = ratio.rolling(self.lookback).std()
-        z = (ratio - mean) / std.replace(0.0, np.nan)
+        close = as_f64(df["Close"])
+        rsp_close = as_f64(df["rsp_close"])
+        z, signal, position = zscore_pipeline(
+            close, rsp_close, self.lookback, self.entry_z, self.exit_z
+        )
 
-        df["ratio"] = ratio
-        df["ratio_mean"] = mean
-        df["ratio_std"] = std
-        df["z_score"] = z.replace([np.inf, -np.inf], np.nan).fillna(0.0)
+        if self.keep_debug_cols:
+            ratio = close / rsp_close
+            mean, std, _ = rolling_zscore(ratio, self.lookback)
+            df["ratio"] = ratio
+            df["ratio_mean"] = mean
+            df["ratio_std"] = std
+        df["z_score"] = z
+        df["signal"] = signal
+        df["position"] = position
         return df
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["signal"] = 0
+        position = df["position"].to_numpy()
+        target_qty = np.abs(position) * self.position_size
 
-        short_spy = df["z_score"] > self.entry_z
-        long_spy = df["z_score"] < -self.entry_z
+        df["target_qty"] = target_qty
 
-        df.loc[short_spy, "signal"] = -1
-        df.loc[long_spy, "signal"] = 1
+        # Optional per-leg guidance for pair execution.
+        df["spy_signal"] = position
+        df["rsp_signal"] = -position
+        df["spy_target_qty"] = target_qty
+        df["rsp_target_qty"] = target_qty
+        return df
 
-        df["position"] = df["signal"].replace(0, np.nan).ffill().fillna(0)
-        exit_mask = df["z_score"].abs() < self.exit_z
-        df.loc[exit_mask, "position"] = 0
+    def grid_search(self, df: pd.DataFrame, params: np.ndarray) -> np.ndarray:
+        """
+        PnL of every parameter set in `params`, evaluated in parallel.
 
-        df["target_qty"] = df["position"].abs() * self.position_size
+        params is a (K, 3) array of (lookback, entry_z, exit_z) rows, each
+        checked like the constructor arguments; lookback must be a whole
+        number. Each set holds position_size shares of SPY against the same number of RSP
+        from the bar after its position changes, so the result is the summed
+        dollar move of that spread; no fills or costs are modelled.
+        """
+        if "rsp_close" not in df.columns:
+            raise ValueError("ZScorePairStrategy requires a 'rsp_close' column with RSP prices.")
+        params = np.asarray(params, dtype=np.float64)
+        if params.ndim != 2 or params.shape[1] != 3:
+            raise ValueError("params must be a (K, 3) array of (lookback, entry_z, exit_z).")
+        lookback, entry_z, exit_z = params.T
+        # Same rules as __init__, per row; negated comparisons also reject NaN
+        if not (np.isfinite(lookback) & (lookback == np.floor(lookback))).all():
+            raise ValueError("lookback must be an integer.")
+        if not (lookback >= 2).all():
+            raise ValueError("lookback must be at least 2.")
+        if not (entry_z > 0).all():
+            raise ValueError("entry_z must be positive.")
+        if not (exit_z >= 0).all():
+            raise ValueError("exit_z must be non-negative.")
+        if not (exit_z < entry_z).all():
+            raise ValueError("exit_z must be less than entry_z.")
 
-        # Optional per-leg guidance for pair execution.
-        df["spy_signal"] = df["position"]
-        df["rsp_signal"] = -df["position"]
-        df["spy_target_qty"] = df["target_qty"]
-        df["rsp_target_qty"] = df["position"].abs() * self.position_size
-        return df
+        return _grid_pnl(
+            as_f64(df["Close"]),
+            as_f64(df["rsp_close"]),
+            lookback.astype(np.int64),
+            np.ascontiguousarray(entry_z),
+            np.ascontiguousarray(exit_z),
+            float(self.position_size),
+        )
@@ -0,0 +1,128 @@
+"""
+Checks for the compiled indicator and simulation kernels.
+
+Runs under pytest, or directly with `python test_kernels.py`.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.simulate import ENTER_LONG_A, ENTER_SHORT_A, EXIT, simulate
+from strategies.indicators import carry_signal, ratio_rsi, rsi
+from strategies.live import BarBuffer, RatioRSI
+
+
+def pandas_rsi(prices: np.ndarray, period: int) -> np.ndarray:
+    """Reference Wilder RSI via ewm(alpha=1/period, adjust=False)"""
+    delta = pd.Series(prices).diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+    out = (100 - 100 / (1 + gain / loss)).to_numpy(copy=True)
+    out[:period] = np.nan
+    return out
+
+
+def sample_prices(periods: int = 300, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, periods))
+
+
+def test_rsi_matches_pandas_ewm() -> None:
+    cases = {
+        "random": sample_prices(),
+        # Constant steps hit the update-skip branch (gain equals the average)
+        "steps": np.concatenate([np.arange(100.0, 130.0), np.arange(130.0, 110.0, -1.0), np.full(20, 110.0)]),
+        "rising": np.arange(1.0, 41.0),
+        "flat": np.full(40, 50.0),
+    }
+    for name, prices in cases.items():
+        for period in (5, 14):
+            np.testing.assert_array_equal(rsi(prices, period), pandas_rsi(prices, period), err_msg=name)
+
+
+def test_ratio_rsi_matches_pandas_ewm() -> None:
+    a = sample_prices(seed=1)
+    b = sample_prices(seed=2) + 50
+    for period in (9, 14):
+        np.testing.assert_array_equal(ratio_rsi(a, b, period), pandas_rsi(a / b, period))
+
+
+def test_carry_signal_flat_mask_keeps_held_signal() -> None:
+    signal = np.array([0, 1, 0, 0, -1, 0, 0], dtype=np.int8)
+    flat = np.array([False, False, True, False, False, True, False])
+    expected = np.array([0, 1, 0, 1, -1, 0, -1], dtype=np.int8)
+    np.testing.assert_array_equal(carry_signal(signal, flat), expected)
+
+
+def test_simulate_two_trades() -> None:
+    close_a = np.array([10.0, 10.0, 9.0, 9.0, 10.0, 11.0])
+    close_b = np.array([20.0, 20.0, 20.0, 21.0, 20.0, 20.0])
+    rsi_values = np.array([50.0, 80.0, 60.0, 40.0, 20.0, 60.0])
+    equity, position, trade_idx, trade_kind, trade_value = simulate(
+        close_a, close_b, rsi_values, 1000.0, 1.0, 70.0, 30.0, 50.0
+    )
+
+    # Short 50 A / long 25 B at bar 1, exit at bar 3 (+75);
+    # long 53 A / short 26 B at bar 4, exit at bar 5 (+53)
+    np.testing.assert_array_equal(equity, [1000.0, 1000.0, 1050.0, 1075.0, 1075.0, 1128.0])
+    np.testing.assert_array_equal(position, [0, -1, -1, 0, 1, 0])
+    np.testing.assert_array_equal(trade_idx, [1, 3, 4, 5])
+    np.testing.assert_array_equal(trade_kind, [ENTER_SHORT_A, EXIT, ENTER_LONG_A, EXIT])
+    np.testing.assert_array_equal(trade_value, [1000.0, 75.0, 1075.0, 53.0])
+
+
+class StubAPI:
+    """Minimal REST stand-in serving bars at or after `start`, like Alpaca's v2 endpoint"""
+
+    class Bars:
+        def __init__(self, df):
+            self.df = df
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def get_bars(self, symbol, timeframe, start=None, **kwargs):
+        df = self.frames[symbol]
+        return self.Bars(df[df.index >= pd.Timestamp(start)])
+
+
+def test_ratio_rsi_update_matches_full_recompute() -> None:
+    end = pd.Timestamp.now(tz="UTC").floor("h")
+    index = pd.date_range(end=end - pd.Timedelta(hours=3), periods=60, freq="h")
+    frames = {
+        "A": pd.DataFrame({"close": sample_prices(60, seed=3)}, index=index),
+        "B": pd.DataFrame({"close": sample_prices(60, seed=4) + 50}, index=index),
+    }
+    api = StubAPI(frames)
+    buffers = [BarBuffer(api, symbol, "1Hour", 100, pd.Timedelta(days=30)) for symbol in ("A", "B")]
+    state = RatioRSI(14)
+
+    def expected() -> float:
+        return rsi(frames["A"]["close"].to_numpy() / frames["B"]["close"].to_numpy(), 14)[-1]
+
+    assert np.isclose(state.update(*buffers), expected(), rtol=0, atol=1e-9)
+    # A repeat tick with no new data must not fold the last bar in twice
+    assert np.isclose(state.update(*buffers), expected(), rtol=0, atol=1e-9)
+
+    # Revise the newest bar and publish three more, as after a missed poll
+    new_index = pd.date_range(index[-1] + pd.Timedelta(hours=1), periods=3, freq="h")
+    for symbol, seed in (("A", 5), ("B", 6)):
+        frame = frames[symbol].copy()
+        frame.iloc[-1, 0] += 0.75
+        extra = pd.DataFrame({"close": frame["close"].iloc[-1] + np.random.default_rng(seed).normal(0, 1, 3)}, index=new_index)
+        frames[symbol] = pd.concat([frame, extra])
+    for buffer in buffers:
+        buffer.refresh()
+
+    assert np.isclose(state.update(*buffers), expected(), rtol=0, atol=1e-9)
+
+
+def main() -> None:
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"ok  {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()